@@ -1,7 +1,8 @@
 # Basic
 import os
+import time
+import logging
 import pandas as pd
-from datetime import datetime
 
 # Streamlit Web UI
 import streamlit as st
@@ -16,52 +17,34 @@ import numpy as np
 plt.rc("font", family="AppleGothic")
 
 # DataBase
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import func
 from dotenv import load_dotenv
+from db import session_scope
+from reference import get_reference
 
-# LangChain Recommendation System
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from dotenv import load_dotenv
-from models import Building, Tag, RealestateDeal, Address
+# Recommendation System (local ranking + LangChain re-ranking)
+from ranking import get_ranker
+from search import search_buildings, load_buildings
+from deal_stats import building_quarter_stats
 
 load_dotenv()
-engine = create_engine(os.getenv("DATABASE_URL"), echo=False)
-
-Session = sessionmaker(bind=engine)
-session = Session()
 
-BUILDING_AGE_THRESHOLD = 5
+# 추천 소요 시간/LLM 재정렬 실패는 key=value 로그로 남겨 집계 (LOG_LEVEL=WARNING이면 지연 시간 생략)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+logger = logging.getLogger("app")
 
 st.set_page_config(page_title="부동산 메이트", layout="centered")
 # st.sidebar.title("🌱 SeSAC Mini Project")
 
 
-def get_price(price):
-    if price == "1억 이하":
-        return (0, 10000)
-    elif price == "1~3억":
-        return (10001, 30000)
-    elif price == "3~5억":
-        return (30001, 50000)
-    elif price == "5~10억":
-        return (50001, 100000)
-    elif price == "10억 이상":
-        return (100001, None)
-
-
-def get_floor(floor):
-    if floor == "전체":
-        return None
-    elif floor == "1~5층 (저층)":
-        return (1, 5)
-    elif floor == "6~8층 (중층)":
-        return (6, 8)
-    elif floor == "9층 이상 (고층)":
-        return (9, None)
+# 입지 조건별 반경 슬라이더 (최소, 최대, 기본값, 간격 m)
+DISTANCE_SLIDERS = {
+    "병세권": (500, 5000, 3000, 500),
+    "역세권": (100, 1500, 500, 100),
+    "버세권": (50, 500, 50, 50),
+}
 
 
 def toggle_filter(filter_key):
@@ -113,37 +96,19 @@ def show_filter_page():
             args=("신축 여부",),
         )
 
+        # 선택한 입지 조건은 반경을 직접 고를 수 있음 (미리 계산한 거리로 검색)
+        distances = {}
+        for label, (minimum, maximum, default, step) in DISTANCE_SLIDERS.items():
+            if st.session_state["filters"][label]:
+                distances[label] = st.slider(
+                    f"{ICON_MAP[label]} {label} 반경 (m)", minimum, maximum, default, step
+                )
+
     with col2:
         st.markdown("#### 🏢 건물 정보")
-        seoul_gu_list = [
-            "강남구",
-            "강동구",
-            "강북구",
-            "강서구",
-            "관악구",
-            "광진구",
-            "구로구",
-            "금천구",
-            "노원구",
-            "도봉구",
-            "동대문구",
-            "동작구",
-            "마포구",
-            "서대문구",
-            "서초구",
-            "성동구",
-            "성북구",
-            "송파구",
-            "양천구",
-            "영등포구",
-            "용산구",
-            "은평구",
-            "종로구",
-            "중구",
-            "중랑구",
-        ]
-
-        selected_gu = st.selectbox("서울 지역구", ["전체"] + seoul_gu_list)
+        # 구 목록은 프로세스 캐시(reference.py)에서 (rerun마다 DB 조회 없음)
+        districts = list(get_reference().districts)
+        selected_gu = st.selectbox("서울 지역구", ["전체"] + districts)
         st.session_state["filters"]["구"] = (
             None if selected_gu == "전체" else selected_gu
         )
@@ -158,6 +123,10 @@ def show_filter_page():
         floor = st.selectbox(
             "층 선택", ["전체", "1~5층 (저층)", "6~8층 (중층)", "9층 이상 (고층)"]
         )
+        sort = st.selectbox(
+            "정렬",
+            ["기본", "지하철역 가까운 순", "버스정류장 가까운 순", "응급실 가까운 순"],
+        )
 
     st.markdown("<br><br>", unsafe_allow_html=True)
 
@@ -171,6 +140,8 @@ def show_filter_page():
                     "건물 면적": size,
                     "가격 범위": price,
                     "층": floor,
+                    "거리": distances,
+                    "정렬": sort,
                 }
             )
             st.session_state["page"] = "splash"
@@ -186,6 +157,8 @@ ICON_MAP = {
     "건물 면적": "📏",
     "가격 범위": "💰",
     "층": "🛗",
+    "거리": "📐",
+    "정렬": "↕️",
 }
 
 
@@ -233,6 +206,14 @@ def show_splash_page():
                 display_text = f"{icon} 건물 면적은 {value[0]} ~ {value[1]} 평"
             elif key == "층":
                 display_text = f"{icon} 층은 {value}"
+            elif key == "거리":
+                display_text = f"{icon} " + ", ".join(
+                    f"{label} {meters}m 이내" for label, meters in value.items()
+                )
+            elif key == "정렬":
+                if value == "기본":
+                    continue
+                display_text = f"{icon} {value}"
             else:
                 display_text = f"{icon} {key}: {value}"
 
@@ -255,42 +236,80 @@ def show_splash_page():
 
 # loading pages
 def show_loading_page():
-    with st.spinner("🏡 AI가 추천 매물을 찾고 있습니다..."):
+    started = time.perf_counter()
+    with st.spinner("🏡 추천 매물을 찾고 있습니다..."):
         search_building()
         get_recommend()
+    # 검색 + 로컬 순위까지가 첫 결과, LLM 재정렬은 결과 페이지에서 기다림
+    first_result = time.perf_counter() - started
+    st.session_state["timings"] = {"started": started, "first_result": first_result}
+    logger.info(
+        "recommendation first_result seconds=%.3f candidates=%d",
+        first_result,
+        len(st.session_state["buildings"]),
+    )
     st.session_state["page"] = "results"
     st.rerun()
 
 
+def cancel_ranking():
+    job = st.session_state.get("ranking_job")
+    if job:
+        job.cancel()
+    st.session_state["ranking_job"] = None
+
+
+@st.fragment(run_every=1)
+def poll_ranking():
+    job = st.session_state.get("ranking_job")
+    if job is None:
+        return
+    ranker = get_ranker()
+    if not ranker.is_ready(job):
+        st.caption("🤖 AI가 추천 순위를 다듬고 있어요...")
+        return
+
+    st.session_state["recommendations"] = ranker.finish(job, timeout=0)
+    st.session_state["ranking_job"] = None
+    timings = st.session_state["timings"]
+    timings["final_result"] = time.perf_counter() - timings["started"]
+    logger.info("recommendation final_result seconds=%.3f", timings["final_result"])
+    st.rerun()
+
+
 # 결과 pages
 def show_results_page():
     if st.button("홈으로", key="back_results"):
+        cancel_ranking()
         st.session_state["page"] = "filters"
         st.rerun()
     st.title("📍 추천 매물 지도")
+    if st.session_state.get("ranking_job"):
+        poll_ranking()
 
+    with session_scope() as session:
+        buildings = load_buildings(session, st.session_state["recommendations"])
+        subways = get_reference(session).facilities["역세권"]
     recommendations = [
         {
             "id": building.id,
             "이름": building.name,
-            "가격": float(building.deals[0].transaction_price_million),
-            "면적": float(building.area_sqm) * 0.3025,
-            "위치": f"서울 {building.address.district}",
-            "주소": (
-                f"서울 {building.address.district} {building.address.legal_dong} {building.address.main_lot_number}"
-                if not building.address.sub_lot_number
-                else f"서울 {building.address.district} {building.address.legal_dong} {building.address.main_lot_number}-{building.address.sub_lot_number}"
-            ),
+            "가격": float(building.deals["transaction_price_million"][0]),
+            "면적": building.area_sqm * 0.3025,
+            "위치": f"서울 {building.district}",
+            "주소": building.lot_address,
             "건축년도": f"{building.construction_year}",
             "유형": f"{building.purpose}",
             "층수": f"{building.floor}",
-            "lat": building.address.latitude,
-            "lon": building.address.longitude,
+            "lat": building.latitude,
+            "lon": building.longitude,
+            "지하철역 거리": building.subway_meters,
+            "지하철역": subways.get(building.subway_id),
         }
-        for building in session.query(Building)
-        .filter(Building.id.in_(st.session_state["recommendations"]))
-        .all()
+        for building in buildings
     ]
+    deals_by_building = {building.id: building.deals for building in buildings}
+    quarters_by_building = {building.id: building.quarters for building in buildings}
 
     if recommendations:
         min_lat = min(rec["lat"] for rec in recommendations)
@@ -319,6 +338,13 @@ def show_results_page():
             popup=folium.Popup(popup_content, max_width=300),
             icon=folium.Icon(color="blue"),
         ).add_to(map)
+        if rec["지하철역"] is not None:
+            name, lat, lon = rec["지하철역"]
+            folium.Marker(
+                location=[lat, lon],
+                tooltip=name,
+                icon=folium.Icon(color="gray", icon="train", prefix="fa"),
+            ).add_to(map)
 
     folium_static(map)
 
@@ -329,11 +355,7 @@ def show_results_page():
         tabs = st.tabs(tab_titles)
 
         for tab, rec in zip(tabs, recommendations):
-            deals = (
-                session.query(RealestateDeal)
-                .filter(RealestateDeal.building_id == rec["id"])
-                .all()
-            )
+            deals = deals_by_building[rec["id"]]
             with tab:
                 col1, col2 = st.columns([5, 2])
                 with col1:
@@ -343,20 +365,15 @@ def show_results_page():
                     st.write(f"🔨 건축년도: {rec['건축년도']}년")
                     st.write(f"🏢 유형: {rec['유형']}")
                     st.write(f"🛗 층수: {rec['층수']}층")
+                    if rec["지하철역"] is not None:
+                        st.write(
+                            f"🚇 가장 가까운 지하철역: {rec['지하철역'][0]} {rec['지하철역 거리']:,.0f}m"
+                        )
                 with col2:
                     df = pd.DataFrame(
                         {
-                            "거래 일자": [
-                                "{}-{:02d}-{:02d}".format(
-                                    deal.contract_year,
-                                    deal.contract_month,
-                                    deal.contract_day,
-                                )
-                                for deal in deals
-                            ],
-                            "거래 가격(억)": [
-                                deal.transaction_price_million / 10000 for deal in deals
-                            ],
+                            "거래 일자": deals["contract_date"].astype(str),
+                            "거래 가격(억)": deals["transaction_price_million"] / 10000,
                         }
                     )
                     df = df.sort_values(by=["거래 일자"], ascending=False)
@@ -364,54 +381,16 @@ def show_results_page():
 
                 # 해당 매물의 거래 내역 가져오기
 
-                if not deals:
+                if not len(deals):
                     st.info("거래 내역이 없습니다.")
                 else:
-                    min_year, max_year = (
-                        deals[-1].contract_year,
-                        deals[0].contract_year,
+                    # 미리 집계한 분기 통계(분기당 1행)로 차트 생성, 없으면 거래 내역으로 계산
+                    quarters, counts, prices = building_quarter_stats(
+                        quarters_by_building[rec["id"]], deals
                     )
-                    min_quarter, max_quarter = (
-                        (deals[-1].contract_month - 1) // 3 + 1,
-                        (deals[0].contract_month - 1) // 3 + 1,
-                    )
-
-                    quarters = [
-                        f"{y}.{q}"
-                        for y in range(min_year, max_year + 1)
-                        for q in range(1, 5)
-                        if not (y == min_year and q < min_quarter)
-                        and not (y == max_year and q > max_quarter)
-                    ]
-
                     xticks = np.arange(0, len(quarters), 1)
-
-                    counts = [
-                        sum(
-                            f"{deal.contract_year}.{(deal.contract_month-1)//3+1}"
-                            == quarter
-                            for deal in deals
-                        )
-                        for quarter in quarters
-                    ]
-
-                    prices = []
-                    for quarter, count in zip(quarters, counts):
-                        if count:
-                            price = round(
-                                sum(
-                                    deal.transaction_price_million
-                                    for deal in deals
-                                    if f"{deal.contract_year}.{(deal.contract_month-1)//3+1}"
-                                    == quarter
-                                )
-                                / 10000
-                                / count,
-                                1,
-                            )
-                        else:
-                            price = None
-                        prices.append(price)
+                    max_count = max(max(counts, default=0), 1)
+                    max_price = max((price for price in prices if price), default=1)
 
                     fig = go.Figure(
                         data=go.Bar(
@@ -450,15 +429,15 @@ def show_results_page():
                         yaxis=dict(
                             title=dict(text="거래량"),
                             side="left",
-                            range=[0, max(counts)],
+                            range=[0, max_count],
                             tickmode="array",
-                            tickvals=np.arange(0, max(counts) + 1, 1),
-                            ticktext=np.arange(0, max(counts) + 1, 1),
+                            tickvals=np.arange(0, max_count + 1, 1),
+                            ticktext=np.arange(0, max_count + 1, 1),
                         ),
                         yaxis2=dict(
                             title=dict(text="평균 가격(억)"),
                             side="right",
-                            range=[0, max(price for price in prices if price) * 1.2],
+                            range=[0, max_price * 1.2],
                             overlaying="y",
                             tickmode="sync",
                         ),
@@ -472,108 +451,18 @@ def show_results_page():
 
 # search query building
 def search_building():
-    latest_deal_subquery = (
-        session.query(
-            RealestateDeal.building_id,
-            func.max(
-                RealestateDeal.contract_year * 10000
-                + RealestateDeal.contract_month * 100
-                + RealestateDeal.contract_day
-            ).label("max_date"),
-        )
-        .group_by(RealestateDeal.building_id)
-        .subquery()
-    )
-
-    query = session.query(Building).join(RealestateDeal)
-
-    query = query.join(
-        latest_deal_subquery,
-        (RealestateDeal.building_id == latest_deal_subquery.c.building_id)
-        & (
-            RealestateDeal.contract_year * 10000
-            + RealestateDeal.contract_month * 100
-            + RealestateDeal.contract_day
-            == latest_deal_subquery.c.max_date
-        ),
-    )
-    filters = st.session_state["filters"]
-    new_building = filters.get("신축 여부")
-    building_type = filters.get("건물 유형")
-    tags = [
-        tag
-        for tag, boolean in zip(
-            ["병세권", "역세권", "버세권"],
-            [filters.get("병세권"), filters.get("역세권"), filters.get("버세권")],
-        )
-        if boolean
-    ]
-    size = [size * 3.3058 for size in filters.get("건물 면적")]
-    price_range = get_price(filters.get("가격 범위"))
-    floor = get_floor(filters.get("층"))
-    district = filters.get("구")
-    if district:
-        query = query.filter(Building.address.has(Address.district == district))
-
-    if tags:
-        for tag in tags:
-            query = query.filter(
-                session.query(Tag)
-                .filter(Tag.building_id == Building.id, Tag.label == tag)
-                .exists()
-            )
-
-    if new_building:
-        query = query.filter(
-            Building.construction_year > datetime.now().year - BUILDING_AGE_THRESHOLD
-        )
-
-    if building_type and building_type != "전체":
-        query = query.filter(Building.purpose == building_type)
-
-    query = query.filter(Building.area_sqm.between(size[0], size[1]))
-
-    if price_range[1] is None:
-        query = query.filter(RealestateDeal.transaction_price_million >= price_range[0])
-    else:
-        query = query.filter(
-            RealestateDeal.transaction_price_million.between(
-                price_range[0], price_range[1]
-            )
-        )
-
-    query = query.group_by(Building.id)
-
-    if floor:
-        if floor[1] is None:
-            query = query.filter(Building.floor >= floor[0])
-        else:
-            query = query.filter(Building.floor.between(floor[0], floor[1]))
-
-    buildings = query.limit(50).all()
+    with session_scope() as session:
+        buildings = search_buildings(session, st.session_state["filters"])
     st.session_state["buildings"] = buildings
-    print(len(buildings))
 
 
 def get_recommend():
-    buildings = st.session_state["buildings"]
-    data = [building.to_dict() for building in buildings]
-    schemas = [
-        ResponseSchema(
-            name="ids", description="List of selected building IDs", type="list"
-        )
-    ]
-    parser = StructuredOutputParser.from_response_schemas(schemas)
-    template = PromptTemplate.from_template(
-        "Here is the given dataset:\n{data}\n\n"
-        "Select the 5 best entries and return only their IDs in a JSON list format.\n"
-        'Example output: {{"ids": [14951, 14952, 14953, 14954, 14955]}}\n'
-        f"Output format: {parser.get_format_instructions().replace('{', '{{').replace('}', '}}')}"
+    cancel_ranking()
+    recommendations, job = get_ranker().start(
+        st.session_state["buildings"], st.session_state["filters"]
     )
-    llm = ChatOpenAI(temperature=0)
-    chain = template | llm | parser
-    recommendations = chain.invoke({"data": data}).get("ids")
     st.session_state["recommendations"] = recommendations
+    st.session_state["ranking_job"] = job
 
 
 if "page" not in st.session_state:
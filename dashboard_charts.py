@@ -0,0 +1,122 @@
+import os
+import time
+import argparse
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dashboard_cube import CUBE_DIR, SCATTER_COLUMNS, load_cube, trendline
+
+# 이 행 수를 넘으면 점 대신 2D 밀도(히트맵)로 그림
+SCATTER_ROW_THRESHOLD = int(os.getenv("DASHBOARD_SCATTER_ROWS", 20000))
+DENSITY_BINS = 60
+
+
+def scatter_figure(df, x, y, fit, title, threshold=SCATTER_ROW_THRESHOLD):
+    if len(df) > threshold:
+        # 브라우저에는 원본 점 대신 서버에서 집계한 격자별 거래 수만 보냄
+        counts, x_edges, y_edges = np.histogram2d(df[x], df[y], bins=DENSITY_BINS)
+        fig = go.Figure(
+            go.Heatmap(
+                x=(x_edges[:-1] + x_edges[1:]) / 2,
+                y=(y_edges[:-1] + y_edges[1:]) / 2,
+                z=np.where(counts.T > 0, counts.T, np.nan),
+                colorscale="Blues",
+                colorbar=dict(title="거래 수"),
+            )
+        )
+        fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    else:
+        fig = px.scatter(df, x=x, y=y, title=title, opacity=0.6, render_mode="webgl")
+
+    # 미리 계산한 회귀 결과로 추세선만 그림 (trendline='ols' 재계산 없음)
+    line_x = np.array([fit["x_min"], fit["x_max"]])
+    fig.add_trace(
+        go.Scatter(
+            x=line_x,
+            y=fit["intercept"] + fit["slope"] * line_x,
+            mode="lines",
+            name="OLS",
+            line=dict(color="crimson"),
+        )
+    )
+    fig.update_layout(width=1200, height=600)
+    return fig
+
+
+def quarter_figure(df, title):
+    # 분기 통계(분기당 1행): 거래량 막대 + 평균/최저/최고 금액 선
+    fig = go.Figure(
+        go.Bar(x=df["분기"], y=df["거래량"], name="거래량", marker=dict(color="paleturquoise"))
+    )
+    for column, color in [("평균 금액", "crimson"), ("최저 금액", "gray"), ("최고 금액", "gray")]:
+        fig.add_trace(
+            go.Scatter(
+                x=df["분기"],
+                y=df[column],
+                yaxis="y2",
+                name=column,
+                mode="lines+markers",
+                line=dict(color=color, dash=None if column == "평균 금액" else "dot"),
+            )
+        )
+    fig.update_layout(
+        title=title,
+        yaxis=dict(title="거래량"),
+        yaxis2=dict(title="물건금액", overlaying="y", side="right"),
+        width=1200,
+        height=600,
+    )
+    return fig
+
+
+def correlation_strength(r):
+    size = abs(r)
+    if size >= 0.7:
+        strength = "강한"
+    elif size >= 0.3:
+        strength = "뚜렷한"
+    elif size >= 0.1:
+        strength = "약한"
+    else:
+        return "상관관계가 거의 없음"
+    return f"{strength} {'양' if r > 0 else '음'}의 상관관계"
+
+
+def correlation_text(subject, fit):
+    significance = "통계적으로 유의미한 결과" if fit["p"] < 0.05 else "통계적으로 유의미하지 않음"
+    return f"""
+    **✅ {subject} 물건금액의 상관관계 분석**
+    - **상관계수**: `{fit['r']:.2f}` → {correlation_strength(fit['r'])}
+    - **p-value**: `{fit['p']:.5f}` → {significance}
+    """
+
+
+def benchmark(cube_dir=CUBE_DIR):
+    cube = load_cube(cube_dir)
+    df = cube["scatter"]
+    print(f"rows: {len(df)}")
+    for x in SCATTER_COLUMNS:
+        start = time.perf_counter()
+        legacy = px.scatter(df, x=x, y="물건금액", trendline="ols", opacity=0.6)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fig = scatter_figure(df, x, "물건금액", trendline(cube, x), x)
+        seconds = time.perf_counter() - start
+
+        legacy_size = len(legacy.to_json()) / 1024 / 1024
+        size = len(fig.to_json()) / 1024 / 1024
+        print(
+            f"{x}: svg+ols {legacy_seconds * 1000:.0f}ms {legacy_size:.1f}MB -> "
+            f"{'density' if len(df) > SCATTER_ROW_THRESHOLD else 'webgl'} "
+            f"{seconds * 1000:.0f}ms {size:.2f}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대시보드 산점도 생성 시간/크기 비교")
+    parser.add_argument("--cube-dir", default=CUBE_DIR)
+    args = parser.parse_args()
+    benchmark(args.cube_dir)
@@ -0,0 +1,310 @@
+import os
+import time
+import argparse
+from functools import lru_cache
+
+import pandas as pd
+from sqlalchemy import select
+
+from db import session_scope
+from models import Address, Building, BuildingQuarterStats
+from dashboard_features import (
+    construction_year,
+    fit_trendlines,
+    marker_frame,
+    price_won,
+    region,
+)
+
+CUBE_DIR = os.getenv("DASHBOARD_CUBE_DIR", "Data/cube")
+TOP_N = 30
+
+SOURCE_CSVS = {
+    "deals": "refined-real-estate.csv",
+    "prophet": "real-estate-prophet.csv",
+    "forecast": "forecast_2025.csv",
+}
+
+BUILDING_KEY = "지역+건물명+건물용도"
+MAP_COLUMNS = ["지역", "본번", "부번", "건물명", "위도", "경도"]
+SCATTER_COLUMNS = ["건물면적(㎡)", "건축년도", "층"]
+
+
+def read_sources(data_dir="Data"):
+    return {
+        name: pd.read_csv(os.path.join(data_dir, file_name), encoding="utf-8")
+        for name, file_name in SOURCE_CSVS.items()
+    }
+
+
+def build_tables(deals, prophet, forecast):
+    # 대시보드 탭에서 쓰는 집계만 미리 계산 (원본 데이터프레임은 수정하지 않음)
+    deals = deals.assign(지역=region(deals).astype(str), 물건금액=price_won(deals))
+
+    region_price = (
+        deals.groupby("지역")["물건금액"]
+        .mean()
+        .reset_index(name="평균 금액")
+        .sort_values("평균 금액", ascending=False, ignore_index=True)
+    )
+    region_count = deals["지역"].value_counts().rename_axis("지역").reset_index(name="거래량")
+    floor_price = prophet.groupby("층")["물건금액"].mean().astype(int).reset_index()
+    building_counts = (
+        prophet[BUILDING_KEY].value_counts().rename_axis(BUILDING_KEY).reset_index(name="거래량")
+    )
+
+    # 건물별 월 평균 실거래가 + 예측값
+    actual = prophet.assign(
+        거래일=pd.to_datetime(prophet["거래일"]).dt.to_period("M").dt.to_timestamp()
+    )
+    actual = (
+        actual.groupby([BUILDING_KEY, "거래일"])["물건금액"]
+        .mean()
+        .round()
+        .astype("int64")
+        .reset_index()
+        .assign(구분="실거래")
+    )
+    predicted = pd.DataFrame(
+        {
+            BUILDING_KEY: forecast[BUILDING_KEY],
+            "거래일": pd.to_datetime(forecast["거래일"]),
+            "물건금액": forecast["물건금액(만원)"].astype("int64") * 10000,
+            "구분": "예측",
+        }
+    )
+    building_series = pd.concat([actual, predicted], ignore_index=True).sort_values(
+        [BUILDING_KEY, "거래일"], ignore_index=True
+    )
+
+    top_regions = region_count["지역"].head(TOP_N)
+    building_map = (
+        deals[deals["지역"].isin(top_regions)]
+        .groupby(MAP_COLUMNS)
+        .size()
+        .reset_index(name="거래량")
+    )
+    # 마커 크기/색/팝업도 미리 계산해 두고 대시보드는 그리기만 함
+    building_map = pd.concat(
+        [building_map, marker_frame(building_map).drop(columns=["위도", "경도"])], axis=1
+    )
+
+    # 산점도용 원본 행은 필요한 숫자 컬럼만 작은 타입으로 보관
+    scatter = pd.DataFrame(
+        {
+            "건물면적(㎡)": deals["건물면적(㎡)"].astype("float32"),
+            "건축년도": construction_year(deals).astype("int16"),
+            "층": deals["층"].astype("int16"),
+            "물건금액": deals["물건금액"].astype("int64"),
+        }
+    )
+
+    # 산점도 추세선은 빌드할 때 한 번만 회귀
+    trendlines = fit_trendlines(scatter, SCATTER_COLUMNS)
+
+    tables = {
+        "region_price": region_price,
+        "region_count": region_count,
+        "floor_price": floor_price,
+        "building_counts": building_counts,
+        "building_series": building_series,
+        "building_map": building_map,
+        "scatter": scatter,
+        "trendlines": trendlines,
+    }
+    # 행이 많은 건물 이름 컬럼만 category로 저장
+    for name in ["building_counts", "building_series"]:
+        tables[name][BUILDING_KEY] = tables[name][BUILDING_KEY].astype("category")
+    tables["building_series"]["구분"] = tables["building_series"]["구분"].astype("category")
+    return tables
+
+
+def load_building_quarters(session):
+    # DB의 건물별 분기 통계(building_quarter_stats)를 대시보드 건물 키로 합침 (금액은 원 단위)
+    rows = session.execute(
+        select(
+            Address.district,
+            Address.legal_dong,
+            Building.name,
+            Building.purpose,
+            BuildingQuarterStats.year,
+            BuildingQuarterStats.quarter,
+            BuildingQuarterStats.deal_count,
+            BuildingQuarterStats.price_sum,
+            BuildingQuarterStats.price_min,
+            BuildingQuarterStats.price_max,
+        )
+        .join(Building, Building.id == BuildingQuarterStats.building_id)
+        .join(Address, Address.id == Building.address_id)
+    ).all()
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            "district",
+            "legal_dong",
+            "name",
+            "purpose",
+            "year",
+            "quarter",
+            "count",
+            "sum",
+            "min",
+            "max",
+        ],
+    )
+    df[BUILDING_KEY] = (
+        df["district"] + " " + df["legal_dong"] + " " + df["name"] + " (" + df["purpose"] + ")"
+    )
+    df["분기"] = pd.PeriodIndex.from_fields(
+        year=df["year"], quarter=df["quarter"], freq="Q"
+    ).to_timestamp()
+    # 건물 키가 같은 건물(주소만 다른 동명 건물)은 CSV 집계와 같이 하나로 합침
+    grouped = df.groupby([BUILDING_KEY, "분기"]).agg(
+        {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+    )
+    quarters = pd.DataFrame(
+        {
+            "거래량": grouped["count"].astype("int32"),
+            "평균 금액": (grouped["sum"] / grouped["count"] * 10000).round().astype("int64"),
+            "최저 금액": grouped["min"].astype("int64") * 10000,
+            "최고 금액": grouped["max"].astype("int64") * 10000,
+        }
+    ).reset_index()
+    quarters[BUILDING_KEY] = quarters[BUILDING_KEY].astype("category")
+    return quarters
+
+
+def build_cube(data_dir="Data", cube_dir=CUBE_DIR, quarters=False):
+    tables = build_tables(**read_sources(data_dir))
+    quarters_path = os.path.join(cube_dir, "building_quarters.parquet")
+    if quarters:
+        with session_scope() as session:
+            tables["building_quarters"] = load_building_quarters(session)
+    elif os.path.exists(quarters_path):
+        # 이전에 만든 분기 통계가 CSV 집계와 어긋나지 않도록 제거
+        os.remove(quarters_path)
+    os.makedirs(cube_dir, exist_ok=True)
+    for name, df in tables.items():
+        df.to_parquet(os.path.join(cube_dir, f"{name}.parquet"), index=False)
+    return {name: len(df) for name, df in tables.items()}
+
+
+# Streamlit rerun마다 다시 읽지 않도록 프로세스당 한 번만 로드
+@lru_cache(maxsize=None)
+def load_cube(cube_dir=CUBE_DIR):
+    return {
+        file_name.removesuffix(".parquet"): pd.read_parquet(os.path.join(cube_dir, file_name))
+        for file_name in sorted(os.listdir(cube_dir))
+        if file_name.endswith(".parquet")
+    }
+
+
+def building_quarters(cube, building):
+    # 분기 통계가 없으면(--quarters 없이 생성) None
+    if "building_quarters" not in cube:
+        return None
+    quarters = cube["building_quarters"]
+    return quarters[quarters[BUILDING_KEY] == building]
+
+
+def top_buildings(cube, n=TOP_N):
+    return cube["building_counts"][BUILDING_KEY].head(n).tolist()
+
+
+def trendline(cube, x):
+    trendlines = cube["trendlines"]
+    return trendlines[trendlines["x"] == x].iloc[0].to_dict()
+
+
+def building_series(cube, building, forecast=True):
+    series = cube["building_series"]
+    series = series[series[BUILDING_KEY] == building]
+    if not forecast:
+        series = series[series["구분"] == "실거래"]
+    return series
+
+
+# 기존 대시보드가 rerun마다 하던 데이터 준비 (벤치마크 비교용, 그래프 렌더링 제외)
+def legacy_render(data_dir="Data"):
+    sources = read_sources(data_dir)
+    df1, df2, df3 = sources["deals"], sources["prophet"], sources["forecast"]
+    building = df2[BUILDING_KEY].value_counts().head(TOP_N).index[0]
+    df2[df2[BUILDING_KEY] == building]
+    df2_copy = df2[["거래일", BUILDING_KEY, "물건금액"]].copy()
+    df3_copy = df3[["거래일", BUILDING_KEY, "물건금액(만원)"]].copy()
+    df2_copy["거래일"] = pd.to_datetime(df2_copy["거래일"]).dt.date
+    df3_copy["거래일"] = pd.to_datetime(df3_copy["거래일"]).dt.date
+    df3_copy["물건금액"] = df3_copy["물건금액(만원)"] * 10000
+    join_df = pd.concat([df2_copy, df3_copy], ignore_index=True).sort_values(by="거래일")
+    join_df[join_df[BUILDING_KEY] == building]
+
+    df1["지역"] = df1["자치구명"] + " " + df1["법정동명"]
+    df1["물건금액"] = df1["물건금액(만원)"] * 10000
+    df1.groupby("지역")["물건금액"].mean().reset_index().sort_values(
+        by="물건금액", ascending=False
+    ).head(TOP_N)
+    df1["건축년도"] = df1.apply(
+        lambda row: row["계약연도"] if row["건축년도"] == 0 else row["건축년도"], axis=1
+    )
+    df2.groupby("층")["물건금액"].mean().astype(int).reset_index()
+    top30 = df1["지역"].value_counts().reset_index().head(TOP_N)
+    top30.columns = ["지역", "거래량"]
+    df1[df1["지역"].isin(top30["지역"])].groupby(MAP_COLUMNS).size().reset_index(name="거래량")
+
+
+def cube_render(cube_dir=CUBE_DIR):
+    cube = load_cube(cube_dir)
+    building = top_buildings(cube)[0]
+    building_series(cube, building, forecast=False)
+    building_series(cube, building)
+    cube["region_price"].head(TOP_N)
+    cube["region_count"].head(TOP_N)
+    cube["floor_price"]
+    cube["building_map"]
+    cube["scatter"]
+    for x in SCATTER_COLUMNS:
+        trendline(cube, x)
+
+
+def benchmark(data_dir="Data", cube_dir=CUBE_DIR, repeat=5):
+    start = time.perf_counter()
+    counts = build_cube(data_dir, cube_dir)
+    print(f"cube build: {time.perf_counter() - start:.2f}s {counts}")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy_render(data_dir)
+    legacy_seconds = (time.perf_counter() - start) / repeat
+
+    load_cube.cache_clear()
+    start = time.perf_counter()
+    cube_render(cube_dir)
+    first_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cube_render(cube_dir)
+    cube_seconds = (time.perf_counter() - start) / repeat
+
+    print(f"csv per rerun: {legacy_seconds * 1000:.1f}ms")
+    print(f"cube first load: {first_seconds * 1000:.1f}ms, per rerun: {cube_seconds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대시보드 집계 데이터(Parquet) 생성")
+    parser.add_argument("--data-dir", default="Data")
+    parser.add_argument("--cube-dir", default=CUBE_DIR)
+    parser.add_argument(
+        "--benchmark", action="store_true", help="CSV 재계산과 집계 데이터 로드 시간 비교"
+    )
+    parser.add_argument(
+        "--quarters",
+        action="store_true",
+        help="DB의 건물별 분기 통계(building_quarter_stats)도 포함 (시계열 탭 분기 차트)",
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.data_dir, args.cube_dir)
+    else:
+        print(build_cube(args.data_dir, args.cube_dir, args.quarters))
@@ -0,0 +1,156 @@
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# 거래량이 낮은 값 -> 높은 값 순서
+MARKER_COLORS = np.array(["green", "blue", "purple", "orange", "red"])
+MAX_MARKER_RADIUS = 15
+
+
+# 입력 데이터프레임은 바꾸지 않고 새 Series/DataFrame만 반환
+def region(df):
+    return (df["자치구명"] + " " + df["법정동명"]).astype("category")
+
+
+def construction_year(df):
+    # 건축년도가 0(미상)이면 계약연도로 대체
+    return pd.Series(
+        np.where(df["건축년도"] == 0, df["계약연도"], df["건축년도"]), index=df.index
+    )
+
+
+def price_won(df):
+    return df["물건금액(만원)"] * 10000
+
+
+def color_bins(values, max_value):
+    indexes = (np.asarray(values) / max_value * (len(MARKER_COLORS) - 1)).astype(int)
+    return MARKER_COLORS[indexes]
+
+
+def marker_frame(df_building_count):
+    counts = df_building_count["거래량"]
+    max_count = counts.max()
+    return pd.DataFrame(
+        {
+            "위도": df_building_count["위도"],
+            "경도": df_building_count["경도"],
+            "radius": counts / max_count * MAX_MARKER_RADIUS,
+            "color": color_bins(counts, max_count),
+            "popup": "건물명: " + df_building_count["건물명"].astype(str) + "<br>거래량: "
+            + counts.astype(str) + "회",
+        }
+    )
+
+
+def fit_trendline(x, y):
+    # statsmodels OLS(trendline='ols')와 같은 단순 회귀: 기울기, 절편, 상관계수, p-value
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    result = stats.linregress(x, y)
+    return {
+        "slope": result.slope,
+        "intercept": result.intercept,
+        "r": result.rvalue,
+        "p": result.pvalue,
+        "rows": len(x),
+        "x_min": x.min(),
+        "x_max": x.max(),
+    }
+
+
+def fit_trendlines(df, columns, y="물건금액"):
+    return pd.DataFrame(
+        [{"x": column, **fit_trendline(df[column], df[y])} for column in columns]
+    )
+
+
+# 기존 pages/dashboard.py의 행 단위 처리 (비교용)
+def legacy_get_color(value, max_value):
+    colors = ["green", "blue", "purple", "orange", "red"]
+    idx = int((value / max_value) * (len(colors) - 1))
+    return colors[idx]
+
+
+def legacy_construction_year(df):
+    return df.apply(
+        lambda row: row["계약연도"] if row["건축년도"] == 0 else row["건축년도"], axis=1
+    )
+
+
+def legacy_markers(df_building_count):
+    max_count = df_building_count["거래량"].max()
+    return [
+        (
+            row["위도"],
+            row["경도"],
+            row["거래량"] / max_count * 15,
+            legacy_get_color(row["거래량"], max_count),
+            f"건물명: {row['건물명']}<br>거래량: {row['거래량']}회",
+        )
+        for _, row in df_building_count.iterrows()
+    ]
+
+
+def sample_deals(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    buildings = rng.integers(0, 5000, rows)
+    latitudes, longitudes = rng.uniform(37.4, 37.7, 5000), rng.uniform(126.8, 127.2, 5000)
+    return pd.DataFrame(
+        {
+            "자치구명": rng.choice(["강남구", "송파구", "마포구", "노원구"], rows),
+            "법정동명": rng.choice(["역삼동", "가락동", "공덕동", "상계동"], rows),
+            "건물명": buildings.astype(str),
+            "계약연도": rng.integers(2021, 2025, rows),
+            "건축년도": np.where(rng.random(rows) < 0.05, 0, rng.integers(1970, 2025, rows)),
+            "물건금액(만원)": rng.integers(5000, 300000, rows),
+            "위도": latitudes[buildings],
+            "경도": longitudes[buildings],
+        }
+    )
+
+
+def check(df):
+    # 기존 행 단위 결과와 같은지 확인
+    matches = {
+        "construction_year": construction_year(df).equals(legacy_construction_year(df)),
+        "region": (region(df).astype(str) == df["자치구명"] + " " + df["법정동명"]).all(),
+    }
+    building_count = df.groupby(["건물명", "위도", "경도"]).size().reset_index(name="거래량")
+    markers = list(marker_frame(building_count).itertuples(index=False, name=None))
+    matches["markers"] = markers == legacy_markers(building_count)
+    return matches, building_count
+
+
+def benchmark(data_path=None, rows=200000):
+    df = pd.read_csv(data_path) if data_path else sample_deals(rows)
+    matches, building_count = check(df)
+    print(f"rows: {len(df)}, map buildings: {len(building_count)}, matches: {matches}")
+
+    for name, legacy, vectorized in [
+        ("construction_year", legacy_construction_year, construction_year),
+        ("markers", legacy_markers, marker_frame),
+    ]:
+        data = df if name == "construction_year" else building_count
+        start = time.perf_counter()
+        legacy(data)
+        legacy_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        vectorized(data)
+        vectorized_seconds = time.perf_counter() - start
+        print(
+            f"{name}: row-wise {legacy_seconds * 1000:.1f}ms, "
+            f"vectorized {vectorized_seconds * 1000:.2f}ms "
+            f"({legacy_seconds / vectorized_seconds:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대시보드 전처리 벡터화 검증/벤치마크")
+    parser.add_argument("--data", help="refined-real-estate.csv 경로 (없으면 샘플 데이터)")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+    benchmark(args.data, args.rows)
@@ -0,0 +1,51 @@
+import os
+from functools import lru_cache
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))
+# MySQL wait_timeout(기본 8시간)보다 짧게 재연결
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+
+# 프로세스당 엔진 하나 (Streamlit rerun마다 app.py는 다시 실행되지만 모듈은 캐시됨)
+@lru_cache(maxsize=None)
+def get_engine(url=None):
+    url = url or os.getenv("DATABASE_URL")
+    if url.startswith("sqlite"):
+        return create_engine(url, echo=False)
+    return create_engine(
+        url,
+        echo=False,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker(url=None):
+    return sessionmaker(bind=get_engine(url), expire_on_commit=False)
+
+
+# 요청(스크립트 실행) 단위 세션: 끝나면 커밋하고 반드시 닫아 커넥션을 풀에 반환
+@contextmanager
+def session_scope(url=None):
+    session = get_sessionmaker(url)()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,119 @@
+import time
+import argparse
+
+import numpy as np
+
+
+def quarter_label(quarter_index):
+    return f"{quarter_index // 4}.{quarter_index % 4 + 1}"
+
+
+def quarter_series(quarter_indexes, counts, sums):
+    # 분기 번호(연도*4 + 분기)별 거래 수/가격 합 -> 빈 분기를 채운 거래량과 평균 가격(억)
+    quarter_indexes = np.asarray(quarter_indexes, dtype=np.int64)
+    if len(quarter_indexes) == 0:
+        return [], np.zeros(0, dtype=np.int64), []
+
+    first, last = quarter_indexes.min(), quarter_indexes.max()
+    offsets = quarter_indexes - first
+    size = last - first + 1
+
+    counts = np.bincount(offsets, weights=counts, minlength=size).astype(np.int64)
+    sums = np.bincount(offsets, weights=sums, minlength=size)
+    averages = np.round(sums / 10000 / np.maximum(counts, 1), 1)
+
+    quarters = [quarter_label(index) for index in range(first, last + 1)]
+    avg_prices = [
+        float(average) if count else None for average, count in zip(averages, counts)
+    ]
+    return quarters, counts, avg_prices
+
+
+def quarterly_deal_stats(years, months, prices):
+    # 거래 원본 행에서 바로 계산
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    return quarter_series(years * 4 + (months - 1) // 3, np.ones(len(years)), prices)
+
+
+def stored_quarter_stats(stats):
+    # building_quarter_stats 행(records.QUARTER_DTYPE 배열)에서 계산 (분기당 1행)
+    years = stats["year"].astype(np.int64)
+    quarters = stats["quarter"].astype(np.int64)
+    return quarter_series(years * 4 + quarters - 1, stats["deal_count"], stats["price_sum"])
+
+
+def building_quarter_stats(stats, deals):
+    # 분기 통계가 없거나 거래 수가 맞지 않으면(projections.py 미실행, loader 외 적재) 거래 원본으로 계산
+    if len(stats) and int(stats["deal_count"].sum()) == len(deals):
+        return stored_quarter_stats(stats)
+    return quarterly_deal_stats(
+        deals["contract_year"], deals["contract_month"], deals["transaction_price_million"]
+    )
+
+
+# 기존 show_results_page의 분기별 계산 (벤치마크 비교용)
+def loop_quarterly_deal_stats(deals):
+    min_year, max_year = deals[-1][0], deals[0][0]
+    min_quarter, max_quarter = (deals[-1][1] - 1) // 3 + 1, (deals[0][1] - 1) // 3 + 1
+    quarters = [
+        f"{y}.{q}"
+        for y in range(min_year, max_year + 1)
+        for q in range(1, 5)
+        if not (y == min_year and q < min_quarter)
+        and not (y == max_year and q > max_quarter)
+    ]
+    counts = [
+        sum(f"{year}.{(month-1)//3+1}" == quarter for year, month, _ in deals)
+        for quarter in quarters
+    ]
+    prices = []
+    for quarter, count in zip(quarters, counts):
+        if count:
+            price = round(
+                sum(
+                    price
+                    for year, month, price in deals
+                    if f"{year}.{(month-1)//3+1}" == quarter
+                )
+                / 10000
+                / count,
+                1,
+            )
+        else:
+            price = None
+        prices.append(price)
+    return quarters, counts, prices
+
+
+def benchmark(deal_count=3000, repeat=5):
+    rng = np.random.default_rng(0)
+    years = rng.integers(2022, 2025, deal_count)
+    months = rng.integers(1, 13, deal_count)
+    prices = rng.integers(100000, 300000, deal_count)
+    order = np.lexsort((months, years))[::-1]
+    deals = [(int(years[i]), int(months[i]), int(prices[i])) for i in order]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = loop_quarterly_deal_stats(deals)
+    loop_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = quarterly_deal_stats(years, months, prices)
+    vectorized_seconds = (time.perf_counter() - start) / repeat
+
+    matches = expected[0] == result[0] and list(expected[1]) == list(result[1])
+    matches = matches and expected[2] == result[2]
+    print(f"deals: {deal_count}, quarters: {len(result[0])}")
+    print(f"loop: {loop_seconds * 1000:.1f}ms, numpy: {vectorized_seconds * 1000:.2f}ms")
+    print(f"speedup: {loop_seconds / vectorized_seconds:.0f}x, matches: {matches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="분기별 거래 통계 벤치마크")
+    parser.add_argument("--deals", type=int, default=3000)
+    args = parser.parse_args()
+    benchmark(args.deals)
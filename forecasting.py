@@ -0,0 +1,307 @@
+import os
+import time
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, or_, select
+
+from db import session_scope
+from models import (
+    Address,
+    Building,
+    BuildingForecast,
+    ForecastFit,
+    RealestateDeal,
+)
+from tagging import bulk_insert, chunks
+
+HORIZON = 12
+# 노트북과 같이 월별 데이터가 2개 미만이면 예측하지 않음
+MIN_MONTHS = 2
+# 이보다 이력이 길면 Prophet, 짧은 나머지(롱테일)는 벡터화한 지수평활 기준 모델
+PROPHET_MIN_MONTHS = 24
+SES_ALPHA = 0.3
+WRITE_BATCH_SIZE = 500
+
+
+def has_prophet():
+    return importlib.util.find_spec("prophet") is not None
+
+
+def month_index(years, months):
+    return np.asarray(years, dtype=np.int64) * 12 + np.asarray(months, dtype=np.int64) - 1
+
+
+def month_dates(indexes):
+    indexes = np.asarray(indexes, dtype=np.int64)
+    return pd.to_datetime(
+        pd.DataFrame({"year": indexes // 12, "month": indexes % 12 + 1, "day": 1})
+    ).dt.date
+
+
+def load_stale(session, full=False):
+    # 마지막 예측 이후 거래 수나 최근 계약일이 바뀐 건물만 다시 예측
+    current = (
+        select(
+            RealestateDeal.building_id,
+            func.count(RealestateDeal.id).label("deals"),
+            func.max(RealestateDeal.contract_date).label("last_contract_date"),
+        )
+        .group_by(RealestateDeal.building_id)
+        .subquery()
+    )
+    query = select(current)
+    if not full:
+        query = query.outerjoin(
+            ForecastFit, ForecastFit.building_id == current.c.building_id
+        ).where(
+            or_(
+                ForecastFit.building_id.is_(None),
+                ForecastFit.deals != current.c.deals,
+                ForecastFit.last_contract_date != current.c.last_contract_date,
+            )
+        )
+    return pd.DataFrame(
+        session.execute(query).all(),
+        columns=["building_id", "deals", "last_contract_date"],
+    )
+
+
+def load_monthly_prices(session, building_ids):
+    frames = []
+    for chunk in chunks(building_ids):
+        rows = session.execute(
+            select(
+                RealestateDeal.building_id,
+                RealestateDeal.contract_year,
+                RealestateDeal.contract_month,
+                func.avg(RealestateDeal.transaction_price_million),
+            )
+            .where(RealestateDeal.building_id.in_(chunk))
+            .group_by(
+                RealestateDeal.building_id,
+                RealestateDeal.contract_year,
+                RealestateDeal.contract_month,
+            )
+        ).all()
+        frames.append(
+            pd.DataFrame(rows, columns=["building_id", "year", "month", "price"])
+        )
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["building_id", "year", "month", "price"]
+    )
+    return pd.DataFrame(
+        {
+            "building_id": df["building_id"].astype(np.int64),
+            "month": month_index(df["year"], df["month"]),
+            "price": df["price"].astype(np.float64),
+        }
+    ).sort_values(["building_id", "month"], ignore_index=True)
+
+
+def ses_forecast(history, alpha=SES_ALPHA, horizon=HORIZON):
+    # 모든 건물을 (건물 x 월) 행렬 하나로 만들어 월 단위로 한 번에 지수평활
+    if history.empty:
+        return pd.DataFrame(columns=["building_id", "month", "price"])
+    building_ids, rows = np.unique(history["building_id"], return_inverse=True)
+    first_month = history["month"].min()
+    columns = history["month"].to_numpy() - first_month
+    matrix = np.full((len(building_ids), columns.max() + 1), np.nan)
+    matrix[rows, columns] = history["price"].to_numpy()
+
+    level = np.full(len(building_ids), np.nan)
+    for observed in matrix.T:
+        has_value = ~np.isnan(observed)
+        started = ~np.isnan(level)
+        level = np.where(
+            has_value & started, alpha * observed + (1 - alpha) * level, level
+        )
+        level = np.where(has_value & ~started, observed, level)
+
+    last_months = history.groupby("building_id")["month"].max().to_numpy()
+    steps = np.arange(1, horizon + 1)
+    return pd.DataFrame(
+        {
+            "building_id": np.repeat(building_ids, horizon),
+            "month": (last_months[:, None] + steps).ravel(),
+            "price": np.repeat(level, horizon),
+        }
+    )
+
+
+def fit_prophet(building_id, months, prices, horizon=HORIZON):
+    # 프로세스 풀에서 실행 (prophet은 선택 설치)
+    from prophet import Prophet
+
+    df = pd.DataFrame({"ds": pd.to_datetime(month_dates(months)), "y": prices})
+    model = Prophet()
+    model.fit(df)
+    future = model.make_future_dataframe(periods=horizon, freq="MS", include_history=False)
+    forecast = model.predict(future)
+    last_month = int(months[-1])
+    return pd.DataFrame(
+        {
+            "building_id": building_id,
+            "month": np.arange(last_month + 1, last_month + horizon + 1),
+            "price": forecast["yhat"].to_numpy(),
+        }
+    )
+
+
+def write_forecasts(session, forecasts, stale_df, model):
+    building_ids = stale_df["building_id"].astype(int).tolist()
+    for chunk in chunks(building_ids):
+        session.execute(delete(BuildingForecast).where(BuildingForecast.building_id.in_(chunk)))
+        session.execute(delete(ForecastFit).where(ForecastFit.building_id.in_(chunk)))
+    bulk_insert(
+        session,
+        BuildingForecast,
+        pd.DataFrame(
+            {
+                "building_id": forecasts["building_id"].astype(int),
+                "month": month_dates(forecasts["month"]).to_numpy(),
+                "transaction_price_million": forecasts["price"].round().astype(int),
+            }
+        ),
+    )
+    bulk_insert(
+        session,
+        ForecastFit,
+        pd.DataFrame(
+            {
+                "building_id": stale_df["building_id"].astype(int),
+                "model": model,
+                "deals": stale_df["deals"].astype(int),
+                "last_contract_date": stale_df["last_contract_date"],
+            }
+        ),
+    )
+    # 배치마다 커밋해서 중간에 멈춰도 끝난 건물은 다시 계산하지 않음
+    session.commit()
+
+
+def write_in_batches(session, forecasts, stale_df, model, batch_size=WRITE_BATCH_SIZE):
+    for start in range(0, len(stale_df), batch_size):
+        batch = stale_df.iloc[start : start + batch_size]
+        write_forecasts(
+            session,
+            forecasts[forecasts["building_id"].isin(batch["building_id"])],
+            batch,
+            model,
+        )
+
+
+def run(
+    session,
+    full=False,
+    workers=None,
+    prophet_min_months=PROPHET_MIN_MONTHS,
+    use_prophet=True,
+):
+    started = time.perf_counter()
+    stale_df = load_stale(session, full)
+    history = load_monthly_prices(session, stale_df["building_id"].tolist())
+    months = history.groupby("building_id").size()
+    stale_df = stale_df.assign(
+        months=stale_df["building_id"].map(months).fillna(0).astype(int)
+    )
+
+    too_short = stale_df[stale_df["months"] < MIN_MONTHS]
+    long_series = stale_df[stale_df["months"] >= prophet_min_months]
+    if not long_series.empty and use_prophet and not has_prophet():
+        print("prophet is not installed; long series use the baseline model")
+    if not (use_prophet and has_prophet()):
+        long_series = long_series.iloc[0:0]
+    baseline = stale_df[
+        (stale_df["months"] >= MIN_MONTHS)
+        & ~stale_df["building_id"].isin(long_series["building_id"])
+    ]
+    stats = {}
+
+    empty = pd.DataFrame(columns=["building_id", "month", "price"])
+    write_in_batches(session, empty, too_short, "skip")
+
+    start = time.perf_counter()
+    forecasts = ses_forecast(history[history["building_id"].isin(baseline["building_id"])])
+    write_in_batches(session, forecasts, baseline, "ses")
+    stats["ses"] = (len(baseline), time.perf_counter() - start)
+
+    if not long_series.empty:
+        start = time.perf_counter()
+        series = history[history["building_id"].isin(long_series["building_id"])]
+        pending, done = [], 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    fit_prophet, building_id, group["month"].to_numpy(), group["price"].to_numpy()
+                )
+                for building_id, group in series.groupby("building_id")
+            ]
+            for future in as_completed(futures):
+                pending.append(future.result())
+                if len(pending) >= WRITE_BATCH_SIZE or done + len(pending) == len(futures):
+                    results = pd.concat(pending, ignore_index=True)
+                    write_forecasts(
+                        session,
+                        results,
+                        long_series[long_series["building_id"].isin(results["building_id"])],
+                        "prophet",
+                    )
+                    done += len(pending)
+                    pending = []
+        stats["prophet"] = (len(long_series), time.perf_counter() - start)
+
+    elapsed = time.perf_counter() - started
+    for model, (count, seconds) in stats.items():
+        print(f"{model}: {count} series in {seconds:.2f}s ({count / max(seconds, 1e-9):,.1f} series/sec)")
+    fitted = sum(count for count, _ in stats.values())
+    print(
+        f"total: {fitted} series fitted, {len(too_short)} skipped (< {MIN_MONTHS} months) "
+        f"in {elapsed:.2f}s ({fitted / max(elapsed, 1e-9):,.1f} series/sec)"
+    )
+    return stats
+
+
+def export_csv(session, path):
+    # 대시보드(dashboard_cube.py)가 읽는 forecast_2025.csv 형식으로 저장
+    rows = session.execute(
+        select(
+            BuildingForecast.month,
+            BuildingForecast.transaction_price_million,
+            Address.district,
+            Address.legal_dong,
+            Building.name,
+            Building.purpose,
+        )
+        .join(Building, Building.id == BuildingForecast.building_id)
+        .join(Address)
+        .order_by(BuildingForecast.building_id, BuildingForecast.month)
+    ).all()
+    df = pd.DataFrame(
+        rows, columns=["거래일", "물건금액(만원)", "district", "legal_dong", "name", "purpose"]
+    )
+    df["지역+건물명+건물용도"] = (
+        df["district"] + " " + df["legal_dong"] + " " + df["name"] + " (" + df["purpose"] + ")"
+    )
+    df[["거래일", "물건금액(만원)", "지역+건물명+건물용도"]].to_csv(path, index=False)
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="건물별 가격 예측 (새 거래가 생긴 건물만)")
+    parser.add_argument("--full", action="store_true", help="모든 건물 다시 예측")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--prophet-min-months", type=int, default=PROPHET_MIN_MONTHS)
+    parser.add_argument(
+        "--no-prophet", action="store_true", help="모든 건물에 기준 모델(지수평활) 사용"
+    )
+    parser.add_argument("--csv", help="예측 결과를 대시보드용 CSV로 저장 (예: Data/forecast_2025.csv)")
+    args = parser.parse_args()
+
+    with session_scope() as session:
+        run(session, args.full, args.workers, args.prophet_min_months, not args.no_prophet)
+        if args.csv:
+            print(f"{export_csv(session, args.csv)} rows written to {args.csv}")
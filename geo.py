@@ -0,0 +1,210 @@
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass, asdict
+
+import numpy as np
+from sqlalchemy import func, select
+
+from db import session_scope
+from models import Address, Building, BuildingLatestDeal, GeoCellStats
+
+GEOHASH_PRECISION = 8
+GEOHASH_ALPHABET = np.array(list("0123456789bcdefghjkmnpqrstuvwxyz"))
+
+# 줌 레벨별 클러스터 크기 (geohash 5자리 ≈ 4.9km, 6자리 ≈ 1.2km, 7자리 ≈ 150m)
+ZOOM_PRECISION = {10: 4, 11: 5, 12: 5, 13: 6, 14: 6, 15: 7}
+# geo_cell_stats에 미리 집계해 두는 가장 작은 셀 (1자리까지 모든 상위 셀 포함)
+CELL_PRECISION = max(ZOOM_PRECISION.values())
+BUILDING_ZOOM = 16
+MAX_CLUSTERS = 500
+MAX_BUILDINGS = 1000
+
+SEOUL_BOUNDS = (37.41, 126.76, 37.72, 127.19)
+
+
+@dataclass(frozen=True, slots=True)
+class Cluster:
+    cell: str
+    count: int
+    avg_price_million: float
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True, slots=True)
+class MapBuilding:
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    transaction_price_million: int
+
+
+def geohash_encode(latitudes, longitudes, precision=GEOHASH_PRECISION):
+    # 경도/위도 비트를 번갈아 섞어 5비트씩 base32 문자로 변환 (표준 geohash)
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    bits = precision * 5
+    lon_bits, lat_bits = (bits + 1) // 2, bits // 2
+    lon_cells = np.clip(
+        ((longitudes + 180) / 360 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1
+    )
+    lat_cells = np.clip(
+        ((latitudes + 90) / 180 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1
+    )
+
+    codes = np.zeros(len(latitudes), dtype=np.int64)
+    for bit in range(bits):
+        if bit % 2 == 0:
+            value = (lon_cells >> (lon_bits - 1 - bit // 2)) & 1
+        else:
+            value = (lat_cells >> (lat_bits - 1 - bit // 2)) & 1
+        codes = (codes << 1) | value
+
+    hashes = np.full(len(latitudes), "", dtype=object)
+    for index in range(precision):
+        shift = 5 * (precision - 1 - index)
+        hashes = hashes + GEOHASH_ALPHABET[(codes >> shift) & 31].astype(object)
+    return hashes
+
+
+def cell_size(precision):
+    bits = precision * 5
+    return 180 / (1 << (bits // 2)), 360 / (1 << ((bits + 1) // 2))
+
+
+def cluster_precision(bounds, zoom, max_clusters=MAX_CLUSTERS):
+    # 화면 안 셀 수가 max_clusters를 넘지 않도록 필요하면 더 큰 셀 사용
+    south, west, north, east = bounds
+    precision = ZOOM_PRECISION.get(zoom, 4 if zoom < min(ZOOM_PRECISION) else 7)
+    while precision > 1:
+        lat_size, lon_size = cell_size(precision)
+        cells = (np.ceil((north - south) / lat_size) + 1) * (
+            np.ceil((east - west) / lon_size) + 1
+        )
+        if cells <= max_clusters:
+            break
+        precision -= 1
+    return precision
+
+
+def covering_cells(bounds, precision):
+    # 화면과 겹치는 셀 목록 (셀 중심 좌표를 인코딩, cluster_precision이 개수를 제한)
+    south, west, north, east = bounds
+    lat_size, lon_size = cell_size(precision)
+    rows = np.arange(np.floor((south + 90) / lat_size), np.floor((north + 90) / lat_size) + 1)
+    columns = np.arange(np.floor((west + 180) / lon_size), np.floor((east + 180) / lon_size) + 1)
+    latitudes, longitudes = np.meshgrid((rows + 0.5) * lat_size - 90, (columns + 0.5) * lon_size - 180)
+    return sorted(set(geohash_encode(latitudes.ravel(), longitudes.ravel(), precision)))
+
+
+def in_bounds(bounds):
+    south, west, north, east = bounds
+    return (
+        Address.latitude.between(south, north),
+        Address.longitude.between(west, east),
+    )
+
+
+def query_clusters(session, bounds, precision):
+    # 적재 시 갱신되는 셀 집계를 기본키로 조회 (화면 범위의 주소를 매번 GROUP BY 하지 않음)
+    rows = session.execute(
+        select(
+            GeoCellStats.cell,
+            GeoCellStats.building_count,
+            GeoCellStats.price_sum,
+            GeoCellStats.latitude_sum,
+            GeoCellStats.longitude_sum,
+        ).where(
+            GeoCellStats.precision == precision,
+            GeoCellStats.cell.in_(covering_cells(bounds, precision)),
+        )
+    ).all()
+    return [
+        Cluster(cell, count, round(price / count, 1), latitude / count, longitude / count)
+        for cell, count, price, latitude, longitude in rows
+    ]
+
+
+def query_buildings(session, bounds, limit=MAX_BUILDINGS):
+    # 최근 거래가 있는 건물부터, limit보다 많으면 truncated=True
+    rows = session.execute(
+        select(
+            Building.id,
+            Building.name,
+            Address.latitude,
+            Address.longitude,
+            BuildingLatestDeal.transaction_price_million,
+        )
+        .select_from(Address)
+        .join(Building)
+        .join(BuildingLatestDeal)
+        .where(*in_bounds(bounds))
+        .order_by(BuildingLatestDeal.contract_date.desc(), Building.id)
+        .limit(limit + 1)
+    ).all()
+    return [MapBuilding(*row) for row in rows[:limit]], len(rows) > limit
+
+
+def viewport(session, bounds, zoom):
+    # 고배율에서만 건물 단위, 그 외에는 geohash 셀 단위 집계로 응답 크기를 제한
+    if zoom >= BUILDING_ZOOM:
+        buildings, truncated = query_buildings(session, bounds)
+        return {"zoom": zoom, "clusters": [], "buildings": buildings, "truncated": truncated}
+    precision = cluster_precision(bounds, zoom)
+    return {
+        "zoom": zoom,
+        "precision": precision,
+        "clusters": query_clusters(session, bounds, precision),
+        "buildings": [],
+        "truncated": False,
+    }
+
+
+def to_json(result):
+    return json.dumps(
+        {
+            **result,
+            "clusters": [asdict(cluster) for cluster in result["clusters"]],
+            "buildings": [asdict(building) for building in result["buildings"]],
+        },
+        ensure_ascii=False,
+    )
+
+
+def benchmark(session, bounds=SEOUL_BOUNDS, zooms=range(10, 18)):
+    for zoom in zooms:
+        start = time.perf_counter()
+        result = viewport(session, bounds, zoom)
+        elapsed = time.perf_counter() - start
+        items = len(result["clusters"]) or len(result["buildings"])
+        kind = "clusters" if result["clusters"] else "buildings"
+        truncated = " (truncated)" if result["truncated"] else ""
+        print(
+            f"zoom {zoom}: {items} {kind}{truncated}, {len(to_json(result).encode()) / 1024:.1f}KB, "
+            f"{elapsed * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지도 화면 범위별 클러스터/건물 조회")
+    parser.add_argument(
+        "--bounds",
+        nargs=4,
+        type=float,
+        default=SEOUL_BOUNDS,
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+    )
+    parser.add_argument("--zoom", type=int)
+    parser.add_argument(
+        "--benchmark", action="store_true", help="줌 레벨별 응답 크기와 시간 (기본: 서울 전체)"
+    )
+    args = parser.parse_args()
+
+    with session_scope() as session:
+        if args.benchmark or args.zoom is None:
+            benchmark(session, args.bounds)
+        else:
+            sys.stdout.write(to_json(viewport(session, args.bounds, args.zoom)) + "\n")
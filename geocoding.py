@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+KAKAO_API_URL = os.getenv("KAKAO_API_URL", "https://dapi.kakao.com/v2/local/search/address.json")
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "Data/geocode-cache.db")
+# 카카오 로컬 API 초당 호출 제한보다 낮게
+REQUESTS_PER_SECOND = float(os.getenv("GEOCODE_RPS", 10))
+MAX_WORKERS = 8
+MAX_RETRIES = 3
+# 조회가 끝난 결과를 이 개수마다 캐시에 기록 (중간에 멈춰도 다시 조회하지 않도록)
+CACHE_BATCH_SIZE = 100
+
+
+def normalize_address(addresses):
+    return addresses.astype(str).str.strip().str.split().str.join(" ")
+
+
+def address_names(df):
+    # 노트북의 f"서울특별시 {구} {동} {본번}(-{부번})" 문자열을 행 루프 없이 생성
+    sub_numbers = pd.to_numeric(df["부번"], errors="coerce").fillna(0).astype(int)
+    names = (
+        "서울특별시 "
+        + df["자치구명"].astype(str)
+        + " "
+        + df["법정동명"].astype(str)
+        + " "
+        + df["본번"].astype(int).astype(str)
+        + np.where(sub_numbers == 0, "", "-" + sub_numbers.astype(str))
+    )
+    return normalize_address(names)
+
+
+def attach_coordinates(deals, address_df, dropna=True):
+    # 주소 문자열을 키로 한 번에 merge (원본 deals는 바꾸지 않음)
+    coordinates = pd.DataFrame(
+        {
+            "address": normalize_address(address_df["address"]),
+            "위도": address_df["lat"].astype(float),
+            "경도": address_df["lon"].astype(float),
+        }
+    ).drop_duplicates("address")
+    merged = (
+        deals.drop(columns=["위도", "경도"], errors="ignore")
+        .assign(address=address_names(deals).to_numpy())
+        .merge(coordinates, on="address", how="left")
+        .drop(columns="address")
+    )
+    merged.index = deals.index
+    return merged.dropna(subset=["위도", "경도"]) if dropna else merged
+
+
+class GeocodeCache:
+    # 한 번 조회한 주소(못 찾은 주소 포함)는 다시 API를 호출하지 않도록 저장
+    def __init__(self, path=GEOCODE_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocode "
+            "(address TEXT PRIMARY KEY, lat REAL, lon REAL, updated REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get_many(self, addresses):
+        rows = []
+        with self.lock:
+            for start in range(0, len(addresses), 500):
+                chunk = addresses[start : start + 500]
+                rows.extend(
+                    self.connection.execute(
+                        "SELECT address, lat, lon FROM geocode WHERE address IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+        return pd.DataFrame(rows, columns=["address", "lat", "lon"])
+
+    def set_many(self, results):
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)",
+                [(address, lat, lon, now) for address, lat, lon in results],
+            )
+            self.connection.commit()
+
+
+class RateLimiter:
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class KakaoGeocoder:
+    def __init__(
+        self,
+        api_key=None,
+        url=KAKAO_API_URL,
+        rate=REQUESTS_PER_SECOND,
+        max_workers=MAX_WORKERS,
+    ):
+        self.url = url
+        self.headers = {"Authorization": f"KakaoAK {api_key or os.getenv('KAKAO_API_KEY')}"}
+        self.limiter = RateLimiter(rate)
+        self.max_workers = max_workers
+        self.local = threading.local()
+
+    def session(self):
+        # 스레드마다 연결을 재사용
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def lookup(self, address):
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.wait()
+            response = self.session().get(
+                self.url,
+                headers=self.headers,
+                params={"query": address, "analyze_type": "exact"},
+                timeout=10,
+            )
+            if response.status_code == 429 or response.status_code >= 500:
+                time.sleep(2**attempt * self.limiter.interval)
+                continue
+            response.raise_for_status()
+            docs = response.json().get("documents")
+            if not docs:
+                return address, None, None
+            return address, float(docs[0]["y"]), float(docs[0]["x"])
+        raise RuntimeError(
+            f"geocoding failed after {MAX_RETRIES} retries (status {response.status_code})"
+        )
+
+    def lookup_many(self, addresses):
+        # 끝나는 순서대로 (주소, 결과, 오류) 반환, 실패한 주소가 있어도 나머지는 계속 조회
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.lookup, address): address for address in addresses}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as error:
+                    yield futures[future], None, error
+
+
+def geocode(addresses, cache, client, batch_size=CACHE_BATCH_SIZE):
+    # 실패한 주소는 캐시에 남기지 않아 다음 실행에서 다시 조회, (찾은 주소, 실패 목록) 반환
+    addresses = normalize_address(pd.Series(addresses)).drop_duplicates().tolist()
+    cached = cache.get_many(addresses)
+    missing = sorted(set(addresses) - set(cached["address"]))
+    results, batch, failures = [], [], []
+    for address, result, error in client.lookup_many(missing):
+        if error is not None:
+            failures.append((address, error))
+            continue
+        results.append(result)
+        batch.append(result)
+        if len(batch) >= batch_size:
+            cache.set_many(batch)
+            batch = []
+    if batch:
+        cache.set_many(batch)
+    fetched = pd.DataFrame(results, columns=["address", "lat", "lon"])
+    print(
+        f"{len(addresses)} addresses: {len(cached)} cached, {len(missing)} looked up, "
+        f"{len(failures)} failed"
+    )
+    for address, error in failures[:10]:
+        print(f"  {address}: {error}")
+    if len(failures) > 10:
+        print(f"  ... {len(failures) - 10} more")
+    found = pd.concat(
+        [frame for frame in (cached, fetched) if not frame.empty] or [cached],
+        ignore_index=True,
+    )
+    return found.dropna(subset=["lat", "lon"]), failures
+
+
+def build_address_csv(deals_path, path, cache, client):
+    # api.ipynb 대체: 거래 데이터의 주소 중 처음 보는 주소만 API 조회
+    deals = pd.read_csv(deals_path)
+    found, failures = geocode(address_names(deals), cache, client)
+    found[["address", "lon", "lat"]].to_csv(path, index=False)
+    return len(found), len(failures)
+
+
+# 로컬 테스트용 카카오 API 흉내 서버 (주소 문자열로 결정되는 좌표 반환)
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["query"][0]
+        # 7로 끝나는 주소는 계속 서버 오류 (재시도 후 실패 목록으로)
+        if query.endswith("7"):
+            self.send_response(500)
+            self.end_headers()
+            return
+        digest = sum(query.encode()) % 10000
+        documents = [] if query.endswith("0") else [
+            {"x": str(126.8 + digest / 25000), "y": str(37.4 + digest / 33000)}
+        ]
+        body = json.dumps({"documents": documents}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_check(count=200, rate=50, path=":memory:"):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/v2/local/search/address.json"
+        client = KakaoGeocoder("stub", url, rate=rate)
+        cache = GeocodeCache(path)
+        addresses = [f"서울특별시 강남구 역삼동 {number}" for number in range(1, count + 1)]
+
+        start = time.perf_counter()
+        first, failures = geocode(addresses, cache, client)
+        elapsed = time.perf_counter() - start
+        print(
+            f"first run: {len(first)} found, {len(failures)} failed in {elapsed:.2f}s "
+            f"({count / elapsed:.1f} req/sec, limit {rate})"
+        )
+
+        start = time.perf_counter()
+        second, failures = geocode(addresses, cache, client)
+        print(
+            f"second run: {len(second)} found in {time.perf_counter() - start:.3f}s "
+            f"(cache + {len(failures)} failed addresses retried)"
+        )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주소 좌표 매칭 / 카카오 API 지오코딩")
+    parser.add_argument("--deals", default="Data/refined-real-estate.csv")
+    parser.add_argument("--addresses", default="Data/address-to-geo.csv")
+    parser.add_argument(
+        "--attach", metavar="OUT", help="거래 데이터에 위도/경도를 붙여 저장 (geo-location.ipynb 대체)"
+    )
+    parser.add_argument(
+        "--fetch", action="store_true", help="처음 보는 주소만 API로 조회해 --addresses 파일 갱신"
+    )
+    parser.add_argument(
+        "--stub-check", action="store_true", help="로컬 흉내 서버로 동시 조회/속도 제한/캐시 확인"
+    )
+    args = parser.parse_args()
+
+    if args.stub_check:
+        stub_check()
+    if args.fetch:
+        count, failed = build_address_csv(
+            args.deals, args.addresses, GeocodeCache(), KakaoGeocoder()
+        )
+        print(f"{count} addresses written to {args.addresses}, {failed} failed (retried next run)")
+    if args.attach:
+        start = time.perf_counter()
+        deals = pd.read_csv(args.deals).drop(columns=["Unnamed: 0"], errors="ignore")
+        result = attach_coordinates(deals, pd.read_csv(args.addresses))
+        result.to_csv(args.attach)
+        print(
+            f"{len(result)}/{len(deals)} deals matched in {time.perf_counter() - start:.2f}s "
+            f"-> {args.attach}"
+        )
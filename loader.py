@@ -0,0 +1,282 @@
+import os
+import time
+import argparse
+
+import pandas as pd
+from sqlalchemy import func, select
+
+from db import session_scope
+from geo import geohash_encode
+from models import (
+    Address,
+    Building,
+    RealestateDeal,
+    BusStation,
+    Hospital,
+    Subway,
+    LoadCheckpoint,
+)
+from projections import refresh_cell_stats, refresh_latest_deals, refresh_quarter_stats
+from reference import invalidate_after_commit
+from tagging import (
+    FACILITY_CSV_COLUMNS,
+    FACILITY_KEYS,
+    bulk_insert,
+    dedupe_facilities,
+    load_facility_rows,
+    refresh_distances,
+    retag_addresses,
+)
+
+CHUNK_SIZE = 50000
+
+DEAL_CSV_COLUMNS = {
+    "건물면적(㎡)": "건물면적",
+    "물건금액(만원)": "물건금액",
+    "신고한 개업공인중개사 시군구명": "신고한중개사시군구명",
+}
+
+STEPS = {
+    "address": "address-to-geo.csv",
+    "bus_station": "refined-bus.csv",
+    "hospital": "refined-emergency.csv",
+    "subway": "refined-subway.csv",
+    "deal": "refined-real-estate.csv",
+}
+
+FACILITY_STEPS = {
+    "bus_station": ("버세권", BusStation),
+    "hospital": ("병세권", Hospital),
+    "subway": ("역세권", Subway),
+}
+
+
+def max_id(session, model):
+    return session.scalar(select(func.max(model.id))) or 0
+
+
+def address_key(district, legal_dong, main_lot_number, sub_lot_number):
+    sub_lot_number = 0 if pd.isna(sub_lot_number) else sub_lot_number
+    return (district, legal_dong, int(main_lot_number), int(sub_lot_number))
+
+
+def load_address_ids(session, after_id=0):
+    rows = session.execute(
+        select(
+            Address.id,
+            Address.district,
+            Address.legal_dong,
+            Address.main_lot_number,
+            Address.sub_lot_number,
+        ).where(Address.id > after_id)
+    ).all()
+    return {address_key(*row[1:]): row[0] for row in rows}
+
+
+def load_building_ids(session, after_id=0):
+    rows = session.execute(
+        select(Building.id, Building.address_id, Building.name).where(
+            Building.id > after_id
+        )
+    ).all()
+    return {(address_id, name): id for id, address_id, name in rows}
+
+
+def parse_addresses(df):
+    parts = df["address"].str.split(expand=True)
+    lot_numbers = parts[3].str.split("-", expand=True)
+    sub_lot_numbers = (
+        pd.to_numeric(lot_numbers[1]).astype("Int64")
+        if 1 in lot_numbers.columns
+        else pd.Series(pd.NA, index=df.index, dtype="Int64")
+    )
+    return pd.DataFrame(
+        {
+            "district": parts[1],
+            "legal_dong": parts[2],
+            "main_lot_number": lot_numbers[0].astype(int),
+            "sub_lot_number": sub_lot_numbers,
+            "latitude": df["lat"],
+            "longitude": df["lon"],
+            "geohash": geohash_encode(df["lat"], df["lon"]),
+        }
+    )
+
+
+class Loader:
+    # 외래키는 메모리 dict로 찾고, 새로 넣은 행의 id는 max(id) 이후만 다시 읽음 (단일 writer 가정)
+    def __init__(self, session, data_dir="Data", chunk_size=CHUNK_SIZE):
+        self.session = session
+        self.data_dir = data_dir
+        self.chunk_size = chunk_size
+        self.address_ids = None
+        self.building_ids = None
+        self.new_address_ids = []
+        self.skipped = 0
+
+    def get_checkpoint(self, name):
+        checkpoint = self.session.get(LoadCheckpoint, name)
+        return checkpoint.rows if checkpoint else 0
+
+    def run(self, steps=STEPS):
+        for name in steps:
+            self.run_step(name)
+
+    def run_step(self, name):
+        path = os.path.join(self.data_dir, STEPS[name])
+        done = self.get_checkpoint(name)
+        if done:
+            print(f"[{name}] resuming after {done} rows")
+
+        start = time.perf_counter()
+        rows = written = 0
+        chunks = pd.read_csv(
+            path, skiprows=range(1, done + 1), chunksize=self.chunk_size
+        )
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            written += self.load_chunk(name, chunk)
+            rows += len(chunk)
+            # 데이터와 진행 상황을 같은 트랜잭션으로 커밋해서 중단돼도 이어서 적재 가능
+            self.session.merge(LoadCheckpoint(name=name, rows=done + rows))
+            self.session.commit()
+            elapsed = time.perf_counter() - start
+            print(f"[{name}] {done + rows} rows read ({rows / elapsed:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"[{name}] done: {rows} rows read, {written} rows written "
+            f"in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)"
+        )
+
+    def load_chunk(self, name, chunk):
+        if name == "address":
+            return self.load_addresses(chunk)
+        if name == "deal":
+            return self.load_deals(chunk)
+        return self.load_facilities(name, chunk)
+
+    def load_addresses(self, chunk):
+        if self.address_ids is None:
+            self.address_ids = load_address_ids(self.session)
+        df = parse_addresses(chunk)
+        keys = [address_key(*row) for row in df.iloc[:, :4].itertuples(index=False)]
+        df = df[[key not in self.address_ids for key in keys]]
+        df = df.drop_duplicates(subset=df.columns[:4].tolist())
+        if df.empty:
+            return 0
+
+        last_id = max_id(self.session, Address)
+        count = bulk_insert(self.session, Address, df)
+        new_ids = load_address_ids(self.session, last_id)
+        self.address_ids.update(new_ids)
+        self.new_address_ids.extend(new_ids.values())
+        return count
+
+    def load_facilities(self, name, chunk):
+        label, model = FACILITY_STEPS[name]
+        keys = FACILITY_KEYS[label]
+        columns = [column.name for column in model.__table__.columns]
+        df = chunk.rename(columns=FACILITY_CSV_COLUMNS[label])
+        df = df[[column for column in columns if column in df.columns]]
+
+        stored_df = load_facility_rows(self.session, model)[keys]
+        df = df.merge(stored_df, on=keys, how="left", indicator=True)
+        df = df[df["_merge"] == "left_only"].drop(columns="_merge")
+        count = bulk_insert(self.session, model, dedupe_facilities(df, keys))
+        if count:
+            invalidate_after_commit(self.session)
+        return count
+
+    def load_deals(self, chunk):
+        if self.address_ids is None:
+            self.address_ids = load_address_ids(self.session)
+        if self.building_ids is None:
+            self.building_ids = load_building_ids(self.session)
+
+        df = chunk.drop(columns=["Unnamed: 0"], errors="ignore").rename(
+            columns=DEAL_CSV_COLUMNS
+        )
+        df["address_id"] = [
+            self.address_ids.get(address_key(*row))
+            for row in zip(df["자치구명"], df["법정동명"], df["본번"], df["부번"])
+        ]
+        missing = df["address_id"].isna()
+        self.skipped += int(missing.sum())
+        df = df[~missing].astype({"address_id": int})
+
+        df["building_id"] = self.lookup_buildings(df)
+        new_buildings = df[df["building_id"].isna()].drop_duplicates(
+            subset=["address_id", "건물명"]
+        )
+        if not new_buildings.empty:
+            last_id = max_id(self.session, Building)
+            bulk_insert(
+                self.session,
+                Building,
+                pd.DataFrame(
+                    {
+                        "address_id": new_buildings["address_id"],
+                        "name": new_buildings["건물명"],
+                        "construction_year": new_buildings["건축년도"],
+                        "purpose": new_buildings["건물용도"],
+                        "area_sqm": new_buildings["건물면적"],
+                        "floor": new_buildings["층"],
+                    }
+                ),
+            )
+            self.building_ids.update(load_building_ids(self.session, last_id))
+            df["building_id"] = self.lookup_buildings(df)
+
+        deals = pd.DataFrame(
+            {
+                "building_id": df["building_id"].astype(int),
+                "reception_year": df["접수연도"],
+                "transaction_price_million": df["물건금액"],
+                "report_type": df["신고구분"],
+                "reported_real_estate_agent_district": df["신고한중개사시군구명"],
+                "contract_year": df["계약연도"],
+                "contract_month": df["계약월"],
+                "contract_day": df["계약일"],
+                "contract_date": pd.to_datetime(
+                    pd.DataFrame(
+                        {"year": df["계약연도"], "month": df["계약월"], "day": df["계약일"]}
+                    )
+                ).dt.date,
+            }
+        )
+        count = bulk_insert(self.session, RealestateDeal, deals)
+        building_ids = deals["building_id"].unique().tolist()
+        refresh_latest_deals(self.session, building_ids)
+        refresh_quarter_stats(self.session, building_ids)
+        refresh_cell_stats(self.session, building_ids)
+        return count
+
+    def lookup_buildings(self, df):
+        return [
+            self.building_ids.get(key) for key in zip(df["address_id"], df["건물명"])
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV 데이터를 DB에 일괄 적재")
+    parser.add_argument("steps", nargs="*", help=f"적재할 단계 ({', '.join(STEPS)})")
+    parser.add_argument("--data-dir", default="Data")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument(
+        "--tag", action="store_true", help="새로 적재한 주소를 바로 태깅 (가장 가까운 시설 거리 포함)"
+    )
+    args = parser.parse_args()
+    unknown = set(args.steps) - set(STEPS)
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(sorted(unknown))}")
+
+    with session_scope() as session:
+        loader = Loader(session, args.data_dir, args.chunk_size)
+        loader.run(args.steps or list(STEPS))
+        if loader.skipped:
+            print(f"{loader.skipped} deals skipped (address not found)")
+        if args.tag and loader.new_address_ids:
+            print(f"{retag_addresses(session, loader.new_address_ids)} tags created")
+            print(f"distances: {refresh_distances(session, loader.new_address_ids)}")
@@ -0,0 +1,155 @@
+import argparse
+
+from sqlalchemy import bindparam, func, inspect, select, update
+from sqlalchemy.orm import sessionmaker
+
+from db import get_engine
+from geo import geohash_encode
+from models import (
+    Address,
+    AddressFacilityDistance,
+    Base,
+    BuildingLatestDeal,
+    BuildingQuarterStats,
+    GeoCellStats,
+    RealestateDeal,
+)
+from projections import refresh_cell_stats, refresh_latest_deals, refresh_quarter_stats
+from tagging import refresh_distances
+
+BACKFILL_BATCH_SIZE = 100000
+
+CONTRACT_DATE_EXPRESSIONS = {
+    "mysql": "MAKEDATE(contract_year, 1) + INTERVAL (contract_month - 1) MONTH + INTERVAL (contract_day - 1) DAY",
+    "sqlite": "printf('%04d-%02d-%02d', contract_year, contract_month, contract_day)",
+}
+
+
+def create_indexes(engine):
+    # create_all은 이미 있는 테이블에 인덱스를 추가하지 않으므로 따로 생성
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def drop_index(engine, table_name, index_name):
+    if index_name not in {index["name"] for index in inspect(engine).get_indexes(table_name)}:
+        return
+    with engine.begin() as connection:
+        if engine.dialect.name == "mysql":
+            connection.exec_driver_sql(f"DROP INDEX {index_name} ON {table_name}")
+        else:
+            connection.exec_driver_sql(f"DROP INDEX {index_name}")
+
+
+def add_contract_date(engine, batch_size=BACKFILL_BATCH_SIZE):
+    columns = {column["name"] for column in inspect(engine).get_columns("realestate_deal")}
+    if "contract_date" not in columns:
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "ALTER TABLE realestate_deal ADD COLUMN contract_date DATE NULL"
+            )
+
+    # id 구간별로 나눠서 채워 긴 트랜잭션/락을 피함
+    expression = CONTRACT_DATE_EXPRESSIONS[engine.dialect.name]
+    with engine.connect() as connection:
+        last_id = connection.scalar(select(func.max(RealestateDeal.id))) or 0
+    for start in range(0, last_id, batch_size):
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                f"UPDATE realestate_deal SET contract_date = {expression} "
+                f"WHERE id > {start} AND id <= {start + batch_size} AND contract_date IS NULL"
+            )
+
+    if engine.dialect.name == "mysql":
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                "ALTER TABLE realestate_deal MODIFY contract_date DATE NOT NULL"
+            )
+    drop_index(engine, "realestate_deal", "ix_deal_building_date")
+
+
+def add_geohash(engine, batch_size=BACKFILL_BATCH_SIZE):
+    columns = {column["name"] for column in inspect(engine).get_columns("address")}
+    if "geohash" not in columns:
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ALTER TABLE address ADD COLUMN geohash VARCHAR(8) NULL")
+
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(Address.id, Address.latitude, Address.longitude)
+                .where(Address.geohash.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return
+            ids, latitudes, longitudes = zip(*rows)
+            hashes = geohash_encode(latitudes, longitudes)
+            connection.execute(
+                update(Address.__table__)
+                .where(Address.__table__.c.id == bindparam("address_id"))
+                .values(geohash=bindparam("hash")),
+                [
+                    {"address_id": address_id, "hash": value}
+                    for address_id, value in zip(ids, hashes)
+                ],
+            )
+
+
+def rebuild_latest_deals(engine):
+    # 예전 정수형(YYYYMMDD) contract_date로 만들어진 집계 테이블은 다시 생성하고, 비어 있으면 채움
+    columns = inspect(engine).get_columns("building_latest_deal")
+    contract_date = next(column for column in columns if column["name"] == "contract_date")
+    if "INT" in str(contract_date["type"]).upper():
+        BuildingLatestDeal.__table__.drop(engine)
+        BuildingLatestDeal.__table__.create(engine)
+    with sessionmaker(bind=engine)() as session:
+        if session.scalar(select(BuildingLatestDeal.building_id).limit(1)) is not None:
+            return
+        refresh_latest_deals(session)
+        session.commit()
+
+
+def build_quarter_stats(engine):
+    # 새로 만든(비어 있는) 분기 통계 테이블만 채움, 이후에는 loader가 건물별로 갱신
+    with sessionmaker(bind=engine)() as session:
+        if session.scalar(select(BuildingQuarterStats.building_id).limit(1)) is not None:
+            return
+        refresh_quarter_stats(session)
+        session.commit()
+
+
+def build_cell_stats(engine):
+    # 지도 셀 집계도 비어 있을 때만 채움 (geohash 백필, 최근 거래 테이블 다음)
+    with sessionmaker(bind=engine)() as session:
+        if session.scalar(select(GeoCellStats.cell).limit(1)) is not None:
+            return
+        refresh_cell_stats(session)
+        session.commit()
+
+
+def build_distances(engine):
+    # 최근접 시설 거리도 비어 있을 때만 전체 계산 (이후에는 loader --tag가 새 주소만 계산)
+    with sessionmaker(bind=engine)() as session:
+        if session.scalar(select(AddressFacilityDistance.address_id).limit(1)) is not None:
+            return
+        refresh_distances(session)
+
+
+def migrate(engine):
+    Base.metadata.create_all(engine)
+    add_contract_date(engine)
+    add_geohash(engine)
+    rebuild_latest_deals(engine)
+    build_quarter_stats(engine)
+    build_cell_stats(engine)
+    build_distances(engine)
+    create_indexes(engine)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 DB 스키마 갱신")
+    parser.parse_args()
+
+    migrate(get_engine())
@@ -1,10 +1,15 @@
+from decimal import Decimal
+
 from sqlalchemy import (
+    BigInteger,
     Column,
+    Date,
     String,
     SmallInteger,
     Float,
     DECIMAL,
     ForeignKey,
+    Index,
     Integer,
     UniqueConstraint,
 )
@@ -15,8 +20,22 @@ from sqlalchemy import desc
 Base = declarative_base()
 
 
+def column_dict(instance):
+    # 컬럼 값만 (로드된 관계 제외), DECIMAL은 float로
+    values = {column.key: getattr(instance, column.key) for column in instance.__table__.columns}
+    return {
+        key: float(value) if isinstance(value, Decimal) else value
+        for key, value in values.items()
+    }
+
+
 class Address(Base):
     __tablename__ = "address"
+    __table_args__ = (
+        Index("ix_address_district", "district"),
+        Index("ix_address_geohash", "geohash"),
+        Index("ix_address_lat_lon", "latitude", "longitude"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     district = Column(String(4), nullable=False)
@@ -25,20 +44,27 @@ class Address(Base):
     sub_lot_number = Column(SmallInteger, nullable=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    # 지도 클러스터링용 geohash (앞 n자리가 같으면 같은 셀)
+    geohash = Column(String(8), nullable=True)
 
     buildings = relationship("Building", back_populates="address")
+    facility_distance = relationship(
+        "AddressFacilityDistance", uselist=False, viewonly=True
+    )
 
     def __repr__(self):
         return f"<Address(district={self.district}, legal_dong={self.legal_dong}, main_lot_number={self.main_lot_number}, sub_lot_number={self.sub_lot_number}, latitude={self.latitude}, longitude={self.longitude})>"
 
     def to_dict(self):
-        return {
-            key: value for key, value in vars(self).items() if not key.startswith("_")
-        }
+        return column_dict(self)
 
 
 class RealestateDeal(Base):
     __tablename__ = "realestate_deal"
+    __table_args__ = (
+        Index("ix_deal_building_contract_date", "building_id", "contract_date"),
+        Index("ix_deal_contract_date", "contract_date"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     building_id = Column(Integer, ForeignKey("building.id"), nullable=False)
@@ -49,21 +75,25 @@ class RealestateDeal(Base):
     contract_year = Column(SmallInteger, nullable=False)
     contract_month = Column(SmallInteger, nullable=False)
     contract_day = Column(SmallInteger, nullable=False)
+    contract_date = Column(Date, nullable=False)
 
     building = relationship("Building", back_populates="deals")
 
     def __repr__(self):
-        return f"<RealestateDeal(building_id={self.building_id}, reception_year={self.reception_year}, transaction_price_million={self.transaction_price_million}, report_type={self.report_type}, reported_real_estate_agent_district={self.reported_real_estate_agent_district}, contract_year={self.contract_year}, contract_month={self.contract_month}, contract_day={self.contract_day})>"
+        return f"<RealestateDeal(building_id={self.building_id}, reception_year={self.reception_year}, transaction_price_million={self.transaction_price_million}, report_type={self.report_type}, reported_real_estate_agent_district={self.reported_real_estate_agent_district}, contract_date={self.contract_date})>"
 
     def to_dict(self):
-        return {
-            key: value for key, value in vars(self).items() if not key.startswith("_")
-        }
+        return column_dict(self)
 
 
 class Building(Base):
     __tablename__ = "building"
-    __table_args__ = (UniqueConstraint("address_id", "name", name="uq_address_name"),)
+    __table_args__ = (
+        UniqueConstraint("address_id", "name", name="uq_address_name"),
+        Index("ix_building_purpose_area", "purpose", "area_sqm"),
+        Index("ix_building_area", "area_sqm"),
+        Index("ix_building_construction_year", "construction_year"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     address_id = Column(Integer, ForeignKey("address.id"), nullable=False)
@@ -75,23 +105,79 @@ class Building(Base):
 
     address = relationship("Address", back_populates="buildings")
     tags = relationship("Tag", back_populates="building", cascade="all, delete-orphan")
+    latest_deal = relationship("BuildingLatestDeal", uselist=False, viewonly=True)
     deals = relationship(
         "RealestateDeal",
         back_populates="building",
-        order_by=(
-            desc(RealestateDeal.contract_year),
-            desc(RealestateDeal.contract_month),
-            desc(RealestateDeal.contract_day),
-        ),
+        order_by=(desc(RealestateDeal.contract_date), desc(RealestateDeal.id)),
     )
 
     def __repr__(self):
         return f"<Building(address_id={self.address_id}, name={self.name}, construction_year={self.construction_year}, purpose={self.purpose}, area_sqm={self.area_sqm}, floor={self.floor})>"
 
     def to_dict(self):
-        return {
-            key: value for key, value in vars(self).items() if not key.startswith("_")
-        }
+        return column_dict(self)
+
+
+# 건물별 최근 거래 (검색 시 매번 GROUP BY 하지 않도록 적재 시점에 갱신)
+class BuildingLatestDeal(Base):
+    __tablename__ = "building_latest_deal"
+
+    building_id = Column(Integer, ForeignKey("building.id"), primary_key=True)
+    deal_id = Column(Integer, ForeignKey("realestate_deal.id"), nullable=False)
+    contract_date = Column(Date, nullable=False)
+    transaction_price_million = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<BuildingLatestDeal(building_id={self.building_id}, deal_id={self.deal_id}, contract_date={self.contract_date}, transaction_price_million={self.transaction_price_million})>"
+
+
+# 건물별 분기 거래 통계 (결과 페이지/대시보드 차트용, 거래 적재 시 해당 건물만 갱신)
+class BuildingQuarterStats(Base):
+    __tablename__ = "building_quarter_stats"
+
+    building_id = Column(Integer, ForeignKey("building.id"), primary_key=True)
+    year = Column(SmallInteger, primary_key=True)
+    quarter = Column(SmallInteger, primary_key=True)
+    deal_count = Column(Integer, nullable=False)
+    price_sum = Column(BigInteger, nullable=False)
+    price_min = Column(Integer, nullable=False)
+    price_max = Column(Integer, nullable=False)
+    price_avg = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<BuildingQuarterStats(building_id={self.building_id}, year={self.year}, quarter={self.quarter}, deal_count={self.deal_count}, price_avg={self.price_avg})>"
+
+
+# geohash 셀별 건물 수/최근 거래가/좌표 합계 (지도 클러스터용, 합계라 상위 셀은 하위 셀을 더해 계산)
+class GeoCellStats(Base):
+    __tablename__ = "geo_cell_stats"
+
+    precision = Column(SmallInteger, primary_key=True)
+    cell = Column(String(8), primary_key=True)
+    building_count = Column(Integer, nullable=False)
+    price_sum = Column(BigInteger, nullable=False)
+    latitude_sum = Column(Float, nullable=False)
+    longitude_sum = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<GeoCellStats(precision={self.precision}, cell={self.cell}, building_count={self.building_count})>"
+
+
+# 주소별 가장 가까운 시설과 거리(m) (반경 조건을 바꿔도 다시 태깅하지 않도록 미리 계산)
+class AddressFacilityDistance(Base):
+    __tablename__ = "address_facility_distance"
+
+    address_id = Column(Integer, ForeignKey("address.id"), primary_key=True)
+    hospital_id = Column(Integer, nullable=True)
+    hospital_meters = Column(Float, nullable=True, index=True)
+    subway_id = Column(Integer, nullable=True)
+    subway_meters = Column(Float, nullable=True, index=True)
+    bus_station_id = Column(Integer, nullable=True)
+    bus_station_meters = Column(Float, nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<AddressFacilityDistance(address_id={self.address_id}, hospital_meters={self.hospital_meters}, subway_meters={self.subway_meters}, bus_station_meters={self.bus_station_meters})>"
 
 
 class BusStation(Base):
@@ -138,6 +224,10 @@ class Subway(Base):
 
 class Tag(Base):
     __tablename__ = "tag"
+    __table_args__ = (
+        Index("ix_tag_building_label", "building_id", "label"),
+        Index("ix_tag_label_building", "label", "building_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     building_id = Column(Integer, ForeignKey("building.id"), nullable=False)
@@ -147,3 +237,37 @@ class Tag(Base):
 
     def __repr__(self):
         return f"<Tag(building_id={self.building_id}, label={self.label})>"
+
+
+# 건물별 월 단위 가격 예측 (forecasting.py가 새 거래가 생긴 건물만 다시 계산)
+class BuildingForecast(Base):
+    __tablename__ = "building_forecast"
+
+    building_id = Column(Integer, ForeignKey("building.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    transaction_price_million = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<BuildingForecast(building_id={self.building_id}, month={self.month}, transaction_price_million={self.transaction_price_million})>"
+
+
+class ForecastFit(Base):
+    __tablename__ = "forecast_fit"
+
+    building_id = Column(Integer, ForeignKey("building.id"), primary_key=True)
+    model = Column(String(10), nullable=False)
+    deals = Column(Integer, nullable=False)
+    last_contract_date = Column(Date, nullable=False)
+
+    def __repr__(self):
+        return f"<ForecastFit(building_id={self.building_id}, model={self.model}, deals={self.deals}, last_contract_date={self.last_contract_date})>"
+
+
+class LoadCheckpoint(Base):
+    __tablename__ = "load_checkpoint"
+
+    name = Column(String(20), primary_key=True)
+    rows = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<LoadCheckpoint(name={self.name}, rows={self.rows})>"
@@ -0,0 +1,235 @@
+import sys
+import argparse
+
+from sqlalchemy import delete, func, insert, literal, or_, select
+
+from db import session_scope
+from geo import CELL_PRECISION
+from models import (
+    Address,
+    Building,
+    BuildingLatestDeal,
+    BuildingQuarterStats,
+    GeoCellStats,
+    RealestateDeal,
+)
+from tagging import chunks
+
+# 셀 앞자리 LIKE 조건을 한 쿼리에 이 개수까지만 묶음
+CELL_CHUNK_SIZE = 500
+
+
+def latest_deal_query(building_ids=None):
+    ranked = select(
+        RealestateDeal.building_id,
+        RealestateDeal.id.label("deal_id"),
+        RealestateDeal.contract_date,
+        RealestateDeal.transaction_price_million,
+        func.row_number()
+        .over(
+            partition_by=RealestateDeal.building_id,
+            order_by=(RealestateDeal.contract_date.desc(), RealestateDeal.id.desc()),
+        )
+        .label("rank"),
+    )
+    if building_ids is not None:
+        ranked = ranked.where(RealestateDeal.building_id.in_(building_ids))
+    ranked = ranked.subquery()
+    return select(
+        ranked.c.building_id,
+        ranked.c.deal_id,
+        ranked.c.contract_date,
+        ranked.c.transaction_price_million,
+    ).where(ranked.c.rank == 1)
+
+
+def refresh_latest_deals(session, building_ids=None):
+    columns = ["building_id", "deal_id", "contract_date", "transaction_price_million"]
+    if building_ids is None:
+        session.execute(delete(BuildingLatestDeal))
+        session.execute(
+            insert(BuildingLatestDeal).from_select(columns, latest_deal_query())
+        )
+        return
+
+    for chunk in chunks(sorted(set(building_ids))):
+        session.execute(
+            delete(BuildingLatestDeal).where(BuildingLatestDeal.building_id.in_(chunk))
+        )
+        session.execute(
+            insert(BuildingLatestDeal).from_select(columns, latest_deal_query(chunk))
+        )
+
+
+QUARTER_COLUMNS = [
+    "building_id",
+    "year",
+    "quarter",
+    "deal_count",
+    "price_sum",
+    "price_min",
+    "price_max",
+    "price_avg",
+]
+
+
+def quarter_stats_query(building_ids=None):
+    quarter = ((RealestateDeal.contract_month - 1) // 3 + 1).label("quarter")
+    query = select(
+        RealestateDeal.building_id,
+        RealestateDeal.contract_year,
+        quarter,
+        func.count(RealestateDeal.id),
+        func.sum(RealestateDeal.transaction_price_million),
+        func.min(RealestateDeal.transaction_price_million),
+        func.max(RealestateDeal.transaction_price_million),
+        func.avg(RealestateDeal.transaction_price_million),
+    ).group_by(RealestateDeal.building_id, RealestateDeal.contract_year, quarter)
+    if building_ids is not None:
+        query = query.where(RealestateDeal.building_id.in_(building_ids))
+    return query
+
+
+def refresh_quarter_stats(session, building_ids=None):
+    # 새 거래가 생긴 건물의 분기 통계만 다시 계산 (건물별 인덱스로 해당 건물 거래만 읽음)
+    if building_ids is None:
+        session.execute(delete(BuildingQuarterStats))
+        session.execute(
+            insert(BuildingQuarterStats).from_select(QUARTER_COLUMNS, quarter_stats_query())
+        )
+        return
+
+    for chunk in chunks(sorted(set(building_ids))):
+        session.execute(
+            delete(BuildingQuarterStats).where(BuildingQuarterStats.building_id.in_(chunk))
+        )
+        session.execute(
+            insert(BuildingQuarterStats).from_select(
+                QUARTER_COLUMNS, quarter_stats_query(chunk)
+            )
+        )
+
+
+CELL_COLUMNS = [
+    "precision",
+    "cell",
+    "building_count",
+    "price_sum",
+    "latitude_sum",
+    "longitude_sum",
+]
+
+
+def finest_cell_query(cells=None):
+    cell = func.substr(Address.geohash, 1, CELL_PRECISION).label("cell")
+    query = (
+        select(
+            literal(CELL_PRECISION),
+            cell,
+            func.count(Building.id),
+            func.sum(BuildingLatestDeal.transaction_price_million),
+            func.sum(Address.latitude),
+            func.sum(Address.longitude),
+        )
+        .select_from(Address)
+        .join(Building)
+        .join(BuildingLatestDeal)
+        .where(Address.geohash.is_not(None))
+        .group_by(cell)
+    )
+    if cells is not None:
+        # 앞자리 범위 조건이라 geohash 인덱스 사용
+        query = query.where(or_(*[Address.geohash.startswith(value) for value in cells]))
+    return query
+
+
+def parent_cell_query(precision, cells=None):
+    # 가장 작은 셀의 합계를 앞 precision자리로 묶어 상위 셀 계산
+    cell = func.substr(GeoCellStats.cell, 1, precision).label("cell")
+    query = (
+        select(
+            literal(precision),
+            cell,
+            func.sum(GeoCellStats.building_count),
+            func.sum(GeoCellStats.price_sum),
+            func.sum(GeoCellStats.latitude_sum),
+            func.sum(GeoCellStats.longitude_sum),
+        )
+        .where(GeoCellStats.precision == CELL_PRECISION)
+        .group_by(cell)
+    )
+    if cells is not None:
+        query = query.where(or_(*[GeoCellStats.cell.startswith(value) for value in cells]))
+    return query
+
+
+def replace_cells(session, precision, query, cells=None):
+    condition = GeoCellStats.precision == precision
+    if cells is not None:
+        condition = condition & GeoCellStats.cell.in_(cells)
+    session.execute(delete(GeoCellStats).where(condition))
+    session.execute(insert(GeoCellStats).from_select(CELL_COLUMNS, query))
+
+
+def refresh_cell_stats(session, building_ids=None):
+    # 최근 거래가 바뀐 건물이 속한 셀만 다시 계산 (refresh_latest_deals 다음에 호출)
+    if building_ids is None:
+        replace_cells(session, CELL_PRECISION, finest_cell_query())
+        for precision in range(CELL_PRECISION - 1, 0, -1):
+            replace_cells(session, precision, parent_cell_query(precision))
+        return
+
+    cells = set()
+    for chunk in chunks(sorted(set(building_ids))):
+        cells.update(
+            session.scalars(
+                select(func.substr(Address.geohash, 1, CELL_PRECISION))
+                .join(Building)
+                .where(Building.id.in_(chunk), Address.geohash.is_not(None))
+                .distinct()
+            )
+        )
+    for chunk in chunks(sorted(cells), CELL_CHUNK_SIZE):
+        replace_cells(session, CELL_PRECISION, finest_cell_query(chunk), chunk)
+    for precision in range(CELL_PRECISION - 1, 0, -1):
+        parents = sorted({cell[:precision] for cell in cells})
+        for chunk in chunks(parents, CELL_CHUNK_SIZE):
+            replace_cells(session, precision, parent_cell_query(precision, chunk), chunk)
+
+
+def check_quarter_stats(session):
+    # 저장된 통계가 거래 원본에서 바로 계산한 값과 같은지, 차트용으로 읽는 행 수 비교
+    stored = sorted(
+        tuple(row)
+        for row in session.execute(
+            select(*[getattr(BuildingQuarterStats, column) for column in QUARTER_COLUMNS])
+        )
+    )
+    expected = sorted(tuple(row) for row in session.execute(quarter_stats_query()))
+    matches = len(stored) == len(expected) and all(
+        row[:7] == other[:7] and abs(row[7] - float(other[7])) < 1e-6
+        for row, other in zip(stored, expected)
+    )
+    deals = session.scalar(select(func.count(RealestateDeal.id)))
+    print(
+        f"quarter stats: {len(stored)} rows for {deals} deals "
+        f"({deals / max(len(stored), 1):.1f} deals per row), matches: {matches}"
+    )
+    return matches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색/차트용 집계 테이블 재생성")
+    parser.add_argument(
+        "--check", action="store_true", help="분기 통계가 거래 원본과 같은지 확인 (다르면 exit 1)"
+    )
+    args = parser.parse_args()
+
+    with session_scope() as session:
+        if args.check:
+            if not check_quarter_stats(session):
+                sys.exit(1)
+        else:
+            refresh_latest_deals(session)
+            refresh_quarter_stats(session)
+            refresh_cell_stats(session)
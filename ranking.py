@@ -0,0 +1,217 @@
+import os
+import time
+import logging
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import pandas as pd
+
+from recommend import LLM_TIMEOUT, recommend
+from records import BuildingRecord
+from reference import get_reference
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 5
+PYEONG_PER_SQM = 0.3025
+# 프로세스(모든 Streamlit 세션) 전체에서 동시에 진행하는 LLM 재정렬 수
+LLM_WORKERS = int(os.getenv("RECOMMEND_LLM_WORKERS", 4))
+
+# 점수 가중치: 양수는 클수록, 음수는 작을수록 좋은 항목
+SCORE_WEIGHTS = {
+    "district_price_ratio": -0.3,
+    "price_per_pyeong": -0.15,
+    "age": -0.15,
+    "floor": 0.1,
+    "tag_count": 0.15,
+    "subway_meters": -0.15,
+}
+
+
+@dataclass
+class RankingJob:
+    # 먼저 보여줄 로컬 순위와 백그라운드에서 진행 중인 재정렬 작업
+    local: list
+    future: Future
+    started: float = field(default_factory=time.perf_counter)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def cancel(self):
+        self.future.cancel()
+
+
+class Ranker(ABC):
+    @abstractmethod
+    def rank(self, buildings, filters, k=TOP_K):
+        raise NotImplementedError
+
+    def start(self, buildings, filters, k=TOP_K):
+        # 바로 쓸 수 있는 결과와, 더 나은 결과를 기다릴 작업(없으면 None)을 반환
+        return self.rank(buildings, filters, k), None
+
+
+def district_medians():
+    # 구별 평당 가격 중앙값 (DB 전체 최근 거래 기준, reference 캐시에서 프로세스당 한 번 계산)
+    return {
+        district: median / PYEONG_PER_SQM
+        for district, median in get_reference().district_price_per_sqm.items()
+    }
+
+
+def features(buildings, district_medians=None):
+    df = pd.DataFrame(
+        {
+            "id": [building.id for building in buildings],
+            "district": [building.district for building in buildings],
+            "price": [building.transaction_price_million for building in buildings],
+            "area": [building.area_sqm for building in buildings],
+            "construction_year": [building.construction_year for building in buildings],
+            "floor": [building.floor for building in buildings],
+            "tag_count": [building.tag_count for building in buildings],
+            "subway_meters": [building.subway_meters for building in buildings],
+        }
+    )
+    df["price_per_pyeong"] = df["price"] / (df["area"] * PYEONG_PER_SQM)
+    # 구별 중앙값이 없으면(또는 중앙값에 없는 구) 후보들 안에서의 구별 중앙값 사용
+    if district_medians is None:
+        medians = df.groupby("district")["price_per_pyeong"].transform("median")
+    else:
+        medians = df["district"].map(district_medians).fillna(
+            df.groupby("district")["price_per_pyeong"].transform("median")
+        )
+    df["district_price_ratio"] = df["price_per_pyeong"] / medians
+    df["age"] = date.today().year - df["construction_year"]
+    # 거리 계산이 안 된 주소는 후보 중 가장 먼 거리로 취급
+    df["subway_meters"] = pd.to_numeric(df["subway_meters"], errors="coerce")
+    df["subway_meters"] = df["subway_meters"].fillna(df["subway_meters"].max())
+    return df
+
+
+def normalize(values):
+    values = np.asarray(values, dtype=np.float64)
+    spread = values.max() - values.min()
+    if not spread > 0:
+        return np.zeros_like(values)
+    return (values - values.min()) / spread
+
+
+def score(df, weights=SCORE_WEIGHTS):
+    return sum(weight * normalize(df[column]) for column, weight in weights.items())
+
+
+class LocalRanker(Ranker):
+    # district_medians를 주지 않으면 DB 전체의 구별 중앙값 사용
+    def __init__(self, weights=SCORE_WEIGHTS, district_medians=None):
+        self.weights = weights
+        self.district_medians = district_medians
+
+    def rank(self, buildings, filters, k=TOP_K):
+        if not buildings:
+            return []
+        medians = self.district_medians
+        df = features(buildings, district_medians() if medians is None else medians)
+        scores = score(df, self.weights)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return df["id"].to_numpy()[order].tolist()
+
+
+class LLMRanker(Ranker):
+    # 로컬 점수로 먼저 정렬한 후보를 LLM이 다시 고르고, 시간 초과나 오류면 로컬 결과 사용
+    def __init__(
+        self, fallback=None, timeout=LLM_TIMEOUT, llm=None, workers=LLM_WORKERS, cache=None
+    ):
+        self.fallback = fallback or LocalRanker()
+        self.timeout = timeout
+        self.llm = llm
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # 워커가 모두 바쁘면 줄을 세우지 않고 로컬 순위만 반환 (대기열이 끝없이 쌓이지 않게)
+        self.slots = threading.BoundedSemaphore(workers)
+
+    def start(self, buildings, filters, k=TOP_K):
+        if not buildings:
+            return [], None
+        local = self.fallback.rank(buildings, filters, len(buildings))
+        if not self.slots.acquire(blocking=False):
+            logger.warning("llm_rerank skipped reason=busy candidates=%d", len(buildings))
+            return local[:k], None
+        order = {building_id: index for index, building_id in enumerate(local)}
+        candidates = sorted(buildings, key=lambda building: order[building.id])
+        future = self.executor.submit(recommend, candidates, filters, self.llm, self.cache)
+        future.add_done_callback(lambda _: self.slots.release())
+        return local[:k], RankingJob(local, future)
+
+    def finish(self, job, k=TOP_K, timeout=None):
+        try:
+            ids = job.future.result(timeout=timeout)
+        except TimeoutError:
+            job.cancel()
+            logger.warning("llm_rerank timeout seconds=%.3f", job.elapsed())
+            return job.local[:k]
+        except Exception as error:
+            logger.warning("llm_rerank failed seconds=%.3f error=%r", job.elapsed(), error)
+            return job.local[:k]
+        logger.info("llm_rerank done seconds=%.3f", job.elapsed())
+
+        # LLM이 고른 id를 앞에 두고 모자라면 로컬 순위로 채움
+        ids = [building_id for building_id in ids or [] if building_id in job.local]
+        return (ids + [building_id for building_id in job.local if building_id not in ids])[:k]
+
+    def is_ready(self, job):
+        return job.future.done() or job.elapsed() >= self.timeout
+
+    def rank(self, buildings, filters, k=TOP_K):
+        first, job = self.start(buildings, filters, k)
+        return self.finish(job, k, self.timeout) if job else first
+
+
+@lru_cache(maxsize=None)
+def get_ranker():
+    if os.getenv("RECOMMEND_LLM", "1") == "0":
+        return LocalRanker()
+    return LLMRanker()
+
+
+def benchmark(candidates=50, repeat=100):
+    rng = np.random.default_rng(0)
+    districts = ["강남구", "송파구", "마포구", "노원구"]
+    buildings = [
+        BuildingRecord(
+            id=index,
+            name=f"building-{index}",
+            district=districts[index % len(districts)],
+            legal_dong="",
+            construction_year=int(rng.integers(1980, 2025)),
+            purpose="아파트",
+            area_sqm=float(rng.uniform(20, 200)),
+            floor=int(rng.integers(1, 30)),
+            transaction_price_million=int(rng.integers(10000, 300000)),
+            contract_date=date(2024, 1, 1),
+            tag_count=int(rng.integers(0, 4)),
+            subway_meters=float(rng.uniform(50, 2000)),
+        )
+        for index in range(candidates)
+    ]
+    # DB 없이 측정하도록 후보들의 구별 중앙값을 고정해서 사용
+    medians = features(buildings).groupby("district")["price_per_pyeong"].median().to_dict()
+    ranker = LocalRanker(district_medians=medians)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ids = ranker.rank(buildings, {})
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{candidates} candidates: {elapsed * 1000:.2f}ms per ranking, top {ids}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 추천 점수 벤치마크")
+    parser.add_argument("--candidates", type=int, default=50)
+    args = parser.parse_args()
+    benchmark(args.candidates)
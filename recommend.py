@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import date
+from functools import lru_cache
+
+import tiktoken
+from cachetools import TTLCache
+from langchain_openai import ChatOpenAI
+from langchain.prompts import PromptTemplate
+from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+
+CACHE_MAXSIZE = int(os.getenv("RECOMMEND_CACHE_MAXSIZE", 512))
+CACHE_TTL = int(os.getenv("RECOMMEND_CACHE_TTL", 24 * 60 * 60))
+TOKEN_BUDGET = int(os.getenv("RECOMMEND_TOKEN_BUDGET", 1500))
+LLM_TIMEOUT = float(os.getenv("RECOMMEND_LLM_TIMEOUT", 10))
+LLM_MODEL = "gpt-3.5-turbo"
+
+# 프롬프트용 짧은 컬럼명 -> 값 (가격은 억, 면적은 평 단위로 반올림)
+CANDIDATE_COLUMNS = {
+    "id": lambda building: building.id,
+    "gu": lambda building: building.district,
+    "dong": lambda building: building.legal_dong,
+    "type": lambda building: building.purpose,
+    "built": lambda building: building.construction_year,
+    "py": lambda building: f"{building.area_sqm * 0.3025:.1f}",
+    "fl": lambda building: building.floor,
+    "eok": lambda building: f"{building.transaction_price_million / 10000:.2f}",
+    "deal": lambda building: building.contract_date.strftime("%Y-%m"),
+    "tags": lambda building: building.tag_count,
+    "subway_m": lambda building: (
+        "" if building.subway_meters is None else round(building.subway_meters)
+    ),
+}
+
+
+class MemoryCache:
+    # TTLCache: 만료 시간 + 가득 차면 가장 오래 안 쓴 항목부터 제거(LRU)
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.cache.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.cache[key] = value
+
+
+class SQLiteCache:
+    # 재시작해도 유지되는 디스크 캐시
+    def __init__(self, path, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS recommend_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM recommend_cache WHERE key = ? AND expires > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE recommend_cache SET used = ? WHERE key = ?", (now, key)
+            )
+            self.connection.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO recommend_cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl, now),
+            )
+            self.connection.execute(
+                "DELETE FROM recommend_cache WHERE expires <= ?", (now,)
+            )
+            self.connection.execute(
+                "DELETE FROM recommend_cache WHERE key NOT IN "
+                "(SELECT key FROM recommend_cache ORDER BY used DESC LIMIT ?)",
+                (self.maxsize,),
+            )
+            self.connection.commit()
+
+
+@lru_cache(maxsize=None)
+def get_cache():
+    path = os.getenv("RECOMMEND_CACHE_PATH")
+    return SQLiteCache(path) if path else MemoryCache()
+
+
+def cache_key(filters, building_ids):
+    # 같은 조건 + 같은 후보 집합이면 같은 키 (순서, 튜플/리스트 차이 무시)
+    payload = json.dumps(
+        {"filters": filters, "ids": sorted(building_ids)},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_encoding():
+    try:
+        return tiktoken.encoding_for_model(LLM_MODEL)
+    except Exception:
+        # 오프라인이라 인코딩 파일을 받을 수 없으면 바이트 수로 근사
+        return None
+
+
+def count_tokens(text):
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text.encode()) // 3 + 1
+    return len(encoding.encode(text))
+
+
+def encode_row(values):
+    return ",".join(str(value) for value in values)
+
+
+def encode_candidates(buildings, token_budget=TOKEN_BUDGET):
+    # CSV 형태로 압축하고, 예산을 넘으면 뒤쪽(로컬 점수가 낮은) 후보부터 제외
+    header = encode_row(CANDIDATE_COLUMNS)
+    rows = [
+        encode_row(column(building) for column in CANDIDATE_COLUMNS.values())
+        for building in buildings
+    ]
+    tokens = count_tokens(header) + 1
+    kept = []
+    for row in rows:
+        tokens += count_tokens(row) + 1
+        if token_budget and tokens > token_budget and kept:
+            break
+        kept.append(row)
+    return "\n".join([header, *kept])
+
+
+@lru_cache(maxsize=None)
+def get_parser():
+    schemas = [
+        ResponseSchema(
+            name="ids", description="List of selected building IDs", type="list"
+        )
+    ]
+    return StructuredOutputParser.from_response_schemas(schemas)
+
+
+@lru_cache(maxsize=None)
+def get_template():
+    parser = get_parser()
+    return PromptTemplate.from_template(
+        "Here is the given dataset of apartments in Seoul as CSV "
+        "(gu/dong: district, built: construction year, py: area in pyeong, fl: floor, "
+        "eok: latest price in 100M KRW, deal: latest deal month, tags: nearby station/hospital count, "
+        "subway_m: meters to nearest subway station):\n"
+        "{data}\n\n"
+        "Select the 5 best entries and return only their IDs in a JSON list format.\n"
+        'Example output: {{"ids": [14951, 14952, 14953, 14954, 14955]}}\n'
+        f"Output format: {parser.get_format_instructions().replace('{', '{{').replace('}', '}}')}"
+    )
+
+
+def build_chain(llm):
+    return get_template() | llm | get_parser()
+
+
+# 프롬프트/파서/LLM 체인은 프로세스당 한 번만 생성
+@lru_cache(maxsize=None)
+def get_chain():
+    # 요청 자체에 시간 제한을 걸어 기다리기를 포기한 호출도 워커를 계속 잡고 있지 않게 함
+    return build_chain(ChatOpenAI(temperature=0, timeout=LLM_TIMEOUT, max_retries=0))
+
+
+# buildings는 로컬 점수 순으로 정렬되어 있어야 토큰 예산에 맞춰 잘라낼 때 좋은 후보가 남음
+def recommend(buildings, filters, llm=None, cache=None, token_budget=TOKEN_BUDGET):
+    cache = cache or get_cache()
+    key = cache_key(filters, [building.id for building in buildings])
+    recommendations = cache.get(key)
+    if recommendations is None:
+        data = encode_candidates(buildings, token_budget)
+        chain = get_chain() if llm is None else build_chain(llm)
+        recommendations = chain.invoke({"data": data}).get("ids")
+        cache.set(key, recommendations)
+    return recommendations
+
+
+def benchmark(candidates=50, llm=False):
+    from records import BuildingRecord
+
+    buildings = [
+        BuildingRecord(
+            id=14951 + index,
+            name=f"헬리오시티 {index}",
+            district="송파구",
+            legal_dong="가락동",
+            construction_year=2018,
+            purpose="아파트",
+            area_sqm=84.99,
+            floor=index % 30 + 1,
+            transaction_price_million=180000 + index * 100,
+            contract_date=date(2024, 12, 1),
+            tag_count=index % 4,
+            subway_meters=index * 37.5,
+        )
+        for index in range(candidates)
+    ]
+    formats = {
+        "dict": lambda: str([building.to_dict() for building in buildings]),
+        "compact": lambda: encode_candidates(buildings, token_budget=0),
+        "budget": lambda: encode_candidates(buildings),
+    }
+    print(f"token counter: {'tiktoken' if get_encoding() else 'approximate (offline)'}")
+    for name, encode in formats.items():
+        start = time.perf_counter()
+        data = encode()
+        elapsed = time.perf_counter() - start
+        prompt = get_template().format(data=data)
+        line = f"{name:>8}: {count_tokens(prompt):>6} prompt tokens, encode {elapsed * 1000:.2f}ms"
+        if llm:
+            start = time.perf_counter()
+            get_chain().invoke({"data": data})
+            line += f", LLM {time.perf_counter() - start:.2f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추천 프롬프트 토큰 벤치마크")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--llm", action="store_true", help="실제 LLM 응답 시간도 측정")
+    args = parser.parse_args()
+    benchmark(args.candidates, args.llm)
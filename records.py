@@ -0,0 +1,354 @@
+import time
+import argparse
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from models import (
+    Address,
+    AddressFacilityDistance,
+    Base,
+    Building,
+    BuildingQuarterStats,
+    RealestateDeal,
+)
+
+# 결과 페이지/대시보드용 거래 내역 (행당 19바이트, ORM 객체 대신 사용)
+DEAL_DTYPE = np.dtype(
+    [
+        ("building_id", np.int32),
+        ("contract_date", "datetime64[D]"),
+        ("contract_year", np.int16),
+        ("contract_month", np.int8),
+        ("transaction_price_million", np.int32),
+    ]
+)
+
+# 결과 페이지 차트용 분기 통계 (building_quarter_stats 한 행 = 분기 하나)
+QUARTER_DTYPE = np.dtype(
+    [
+        ("building_id", np.int32),
+        ("year", np.int16),
+        ("quarter", np.int8),
+        ("deal_count", np.int32),
+        ("price_sum", np.int64),
+        ("price_min", np.int32),
+        ("price_max", np.int32),
+        ("price_avg", np.float64),
+    ]
+)
+
+# 분석용 건물 배열 (건물명처럼 길이가 제각각인 문자열은 제외)
+BUILDING_DTYPE = np.dtype(
+    [
+        ("id", np.int32),
+        ("district", "U4"),
+        ("legal_dong", "U6"),
+        ("construction_year", np.int16),
+        ("purpose", "U5"),
+        ("area_sqm", np.float32),
+        ("floor", np.int16),
+        ("latitude", np.float64),
+        ("longitude", np.float64),
+    ]
+)
+
+DEAL_COLUMNS = [getattr(RealestateDeal, name) for name in DEAL_DTYPE.names]
+QUARTER_COLUMNS = [getattr(BuildingQuarterStats, name) for name in QUARTER_DTYPE.names]
+BUILDING_ARRAY_COLUMNS = [
+    Building.id,
+    Address.district,
+    Address.legal_dong,
+    Building.construction_year,
+    Building.purpose,
+    Building.area_sqm,
+    Building.floor,
+    Address.latitude,
+    Address.longitude,
+]
+
+
+def to_array(rows, dtype):
+    # select() 결과 행을 바로 구조화 배열로 (DECIMAL은 여기서 한 번만 float 변환)
+    rows = rows if isinstance(rows, list) else list(rows)
+    return np.fromiter(map(tuple, rows), dtype=dtype, count=len(rows))
+
+
+# 세션과 분리된 읽기 전용 검색 결과 (st.session_state에 그대로 저장)
+@dataclass(frozen=True, slots=True)
+class BuildingRecord:
+    id: int
+    name: str
+    district: str
+    legal_dong: str
+    construction_year: int
+    purpose: str
+    area_sqm: float
+    floor: int
+    transaction_price_million: int
+    contract_date: date
+    tag_count: int
+    subway_meters: float = None
+
+    @classmethod
+    def from_row(cls, row):
+        values = row._asdict()
+        values["area_sqm"] = float(values["area_sqm"])
+        return cls(**values)
+
+    def to_dict(self):
+        data = asdict(self)
+        data["contract_date"] = self.contract_date.isoformat()
+        return data
+
+
+# 결과 페이지용 건물 상세 (주소, 지하철역 거리, 최근 거래 순 거래 내역, 분기 통계 배열)
+@dataclass(frozen=True, slots=True)
+class BuildingDetail:
+    id: int
+    name: str
+    construction_year: int
+    purpose: str
+    area_sqm: float
+    floor: int
+    district: str
+    legal_dong: str
+    main_lot_number: int
+    sub_lot_number: int
+    latitude: float
+    longitude: float
+    subway_id: int
+    subway_meters: float
+    deals: np.ndarray
+    quarters: np.ndarray
+
+    @classmethod
+    def from_row(cls, row, deals, quarters):
+        values = row._asdict()
+        values["area_sqm"] = float(values["area_sqm"])
+        return cls(**values, deals=deals, quarters=quarters)
+
+    @property
+    def lot_address(self):
+        lot = f"{self.main_lot_number}"
+        if self.sub_lot_number:
+            lot += f"-{self.sub_lot_number}"
+        return f"서울 {self.district} {self.legal_dong} {lot}"
+
+
+DETAIL_COLUMNS = [
+    Building.id,
+    Building.name,
+    Building.construction_year,
+    Building.purpose,
+    Building.area_sqm,
+    Building.floor,
+    Address.district,
+    Address.legal_dong,
+    Address.main_lot_number,
+    Address.sub_lot_number,
+    Address.latitude,
+    Address.longitude,
+    AddressFacilityDistance.subway_id,
+    AddressFacilityDistance.subway_meters,
+]
+
+
+def detail_query(building_ids):
+    return (
+        select(*DETAIL_COLUMNS)
+        .join(Address, Address.id == Building.address_id)
+        .outerjoin(AddressFacilityDistance, AddressFacilityDistance.address_id == Address.id)
+        .where(Building.id.in_(building_ids))
+    )
+
+
+def deal_query(building_ids):
+    return (
+        select(*DEAL_COLUMNS)
+        .where(RealestateDeal.building_id.in_(building_ids))
+        .order_by(
+            RealestateDeal.building_id,
+            RealestateDeal.contract_date.desc(),
+            RealestateDeal.id.desc(),
+        )
+    )
+
+
+def quarter_query(building_ids):
+    return (
+        select(*QUARTER_COLUMNS)
+        .where(BuildingQuarterStats.building_id.in_(building_ids))
+        .order_by(
+            BuildingQuarterStats.building_id,
+            BuildingQuarterStats.year,
+            BuildingQuarterStats.quarter,
+        )
+    )
+
+
+def split_by_building(array, building_ids):
+    # building_id로 정렬된 배열을 건물별 구간(복사 없는 view)으로 나눔
+    starts = np.searchsorted(array["building_id"], building_ids, side="left")
+    ends = np.searchsorted(array["building_id"], building_ids, side="right")
+    return {
+        building_id: array[start:end]
+        for building_id, start, end in zip(building_ids, starts, ends)
+    }
+
+
+def load_details(session, building_ids):
+    # 건물 수와 상관없이 쿼리 3번, 결과는 building_ids 순서
+    if not building_ids:
+        return []
+    deals = split_by_building(
+        to_array(session.execute(deal_query(building_ids)), DEAL_DTYPE), building_ids
+    )
+    quarters = split_by_building(
+        to_array(session.execute(quarter_query(building_ids)), QUARTER_DTYPE), building_ids
+    )
+    details = {
+        row.id: BuildingDetail.from_row(row, deals[row.id], quarters[row.id])
+        for row in session.execute(detail_query(building_ids))
+    }
+    return [details[building_id] for building_id in building_ids if building_id in details]
+
+
+def load_building_array(session, building_ids=None):
+    query = select(*BUILDING_ARRAY_COLUMNS).join(Address, Address.id == Building.address_id)
+    if building_ids is not None:
+        query = query.where(Building.id.in_(building_ids))
+    return to_array(session.execute(query.order_by(Building.id)), BUILDING_DTYPE)
+
+
+def seed(session, rows):
+    # 벤치마크용 메모리 DB (주소 10개당 건물 10개, 건물마다 거래 1건)
+    addresses = rows // 10 + 1
+    session.execute(
+        insert(Address),
+        [
+            {
+                "id": index + 1,
+                "district": "강남구",
+                "legal_dong": "역삼동",
+                "main_lot_number": index % 900 + 1,
+                "sub_lot_number": index % 7,
+                "latitude": 37.5 + index * 1e-6,
+                "longitude": 127.0 + index * 1e-6,
+            }
+            for index in range(addresses)
+        ],
+    )
+    session.execute(
+        insert(Building),
+        [
+            {
+                "id": index + 1,
+                "address_id": index % addresses + 1,
+                "name": f"건물{index}",
+                "construction_year": 1990 + index % 35,
+                "purpose": "아파트",
+                "area_sqm": Decimal(f"{20 + index % 100}.{index % 100:02d}"),
+                "floor": index % 30 + 1,
+            }
+            for index in range(rows)
+        ],
+    )
+    session.execute(
+        insert(RealestateDeal),
+        [
+            {
+                "building_id": index + 1,
+                "reception_year": 2024,
+                "transaction_price_million": 30000 + index % 100000,
+                "report_type": "중개거래",
+                "reported_real_estate_agent_district": "서울 강남구",
+                "contract_year": 2024,
+                "contract_month": index % 12 + 1,
+                "contract_day": 1,
+                "contract_date": date(2024, 1, 1) + timedelta(days=index % 365),
+            }
+            for index in range(rows)
+        ],
+    )
+    session.commit()
+
+
+def measure(build):
+    # 시간은 tracemalloc 없이, 메모리는 만든 객체를 살려둔 채로 늘어난 양(tracemalloc)으로 측정
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, size
+
+
+def benchmark(sizes=(50, 5000, 500000)):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, max(sizes))
+
+    paths = {
+        "orm building+address": lambda session, limit: session.query(Building)
+        .options(selectinload(Building.address))
+        .order_by(Building.id)
+        .limit(limit)
+        .all(),
+        "BuildingDetail": lambda session, limit: [
+            BuildingDetail.from_row(row, None, None)
+            for row in session.execute(
+                select(*DETAIL_COLUMNS)
+                .join(Address, Address.id == Building.address_id)
+                .outerjoin(AddressFacilityDistance, AddressFacilityDistance.address_id == Address.id)
+                .order_by(Building.id)
+                .limit(limit)
+            )
+        ],
+        "building array": lambda session, limit: to_array(
+            session.execute(
+                select(*BUILDING_ARRAY_COLUMNS)
+                .join(Address, Address.id == Building.address_id)
+                .order_by(Building.id)
+                .limit(limit)
+            ),
+            BUILDING_DTYPE,
+        ),
+        "orm deal": lambda session, limit: session.query(RealestateDeal)
+        .order_by(RealestateDeal.id)
+        .limit(limit)
+        .all(),
+        "deal array": lambda session, limit: to_array(
+            session.execute(select(*DEAL_COLUMNS).order_by(RealestateDeal.id).limit(limit)),
+            DEAL_DTYPE,
+        ),
+    }
+    for rows in sizes:
+        print(f"rows: {rows}")
+        for name, build in paths.items():
+            with Session(engine) as session:
+                # 쿼리 컴파일 캐시를 미리 채움
+                build(session, 1)
+                session.expunge_all()
+                result, seconds, size = measure(lambda: build(session, rows))
+                assert len(result) == rows
+            print(
+                f"  {name:<22} {seconds * 1000:>9.1f}ms  "
+                f"{size / rows:>7.0f} bytes/row  ({size / 1024 / 1024:.1f}MB)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="읽기 전용 레코드/배열 vs ORM 객체 메모리와 생성 시간 비교")
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 5000, 500000])
+    args = parser.parse_args()
+    benchmark(args.rows)
@@ -0,0 +1,221 @@
+import os
+import time
+import argparse
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, func, select
+
+from db import session_scope
+from models import Address, Building, BuildingLatestDeal, BusStation, Hospital, Subway
+
+# 이 시간(초)이 지나면 버전만 확인하고, 바뀐 테이블만 다시 읽음
+REFERENCE_TTL = int(os.getenv("REFERENCE_TTL", 300))
+
+FACILITY_MODELS = {
+    "병세권": Hospital,
+    "역세권": Subway,
+    "버세권": BusStation,
+}
+DISTRICT_KEY = "구"
+DEAL_KEY = "거래"
+
+
+# 시설 좌표/이름 배열과 id -> 위치 매핑 (프로세스 안에서 공유, 읽기 전용)
+@dataclass(frozen=True, slots=True)
+class Facilities:
+    ids: np.ndarray
+    names: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    positions: dict
+    version: tuple
+
+    def frame(self):
+        return pd.DataFrame(
+            {"id": self.ids, "latitude": self.latitudes, "longitude": self.longitudes}
+        )
+
+    def get(self, facility_id):
+        # (이름, 위도, 경도), 없는 id면 None
+        position = self.positions.get(facility_id)
+        if position is None:
+            return None
+        return self.names[position], self.latitudes[position], self.longitudes[position]
+
+
+@dataclass(frozen=True, slots=True)
+class ReferenceData:
+    facilities: dict
+    districts: tuple
+    # 구별 최근 거래가(만원)/면적(㎡) 중앙값 (추천 점수의 구 대비 가격 기준)
+    district_price_per_sqm: dict
+    versions: dict
+    checked_at: float
+
+
+def table_version(session, model):
+    # 행 수/최대 id/좌표 합이 같으면 같은 데이터로 봄 (시설 추가, 삭제, 이동 감지)
+    count, max_id, latitude, longitude = session.execute(
+        select(
+            func.count(model.id),
+            func.max(model.id),
+            func.sum(model.latitude),
+            func.sum(model.longitude),
+        )
+    ).one()
+    return count, max_id, round(latitude or 0, 6), round(longitude or 0, 6)
+
+
+def load_versions(session):
+    versions = {label: table_version(session, model) for label, model in FACILITY_MODELS.items()}
+    versions[DISTRICT_KEY] = tuple(
+        session.execute(select(func.count(Address.id), func.max(Address.id))).one()
+    )
+    versions[DEAL_KEY] = tuple(
+        session.execute(
+            select(func.count(BuildingLatestDeal.building_id), func.max(BuildingLatestDeal.deal_id))
+        ).one()
+    )
+    return versions
+
+
+def load_facilities(session, model, version):
+    df = pd.DataFrame(
+        session.execute(
+            select(model.id, model.name, model.latitude, model.longitude).order_by(model.id)
+        ).all(),
+        columns=["id", "name", "latitude", "longitude"],
+    )
+    ids = df["id"].to_numpy(dtype=np.int64)
+    return Facilities(
+        ids=ids,
+        names=df["name"].to_numpy(dtype=object),
+        latitudes=df["latitude"].to_numpy(dtype=np.float64),
+        longitudes=df["longitude"].to_numpy(dtype=np.float64),
+        positions={facility_id: position for position, facility_id in enumerate(ids.tolist())},
+        version=version,
+    )
+
+
+def load_districts(session):
+    return tuple(session.scalars(select(Address.district).distinct().order_by(Address.district)))
+
+
+def load_district_price_per_sqm(session):
+    df = pd.DataFrame(
+        session.execute(
+            select(Address.district, BuildingLatestDeal.transaction_price_million, Building.area_sqm)
+            .select_from(BuildingLatestDeal)
+            .join(Building)
+            .join(Address)
+        ).all(),
+        columns=["district", "price", "area"],
+    )
+    price_per_sqm = df["price"] / df["area"].astype(float)
+    return price_per_sqm.groupby(df["district"]).median().to_dict()
+
+
+def load_reference(session, previous=None):
+    # 버전을 먼저 읽고 데이터를 읽음 (그 사이에 바뀌면 다음 확인 때 다시 읽힘)
+    versions = load_versions(session)
+    facilities = {}
+    for label, model in FACILITY_MODELS.items():
+        cached = previous and previous.facilities[label]
+        if cached and cached.version == versions[label]:
+            facilities[label] = cached
+        else:
+            facilities[label] = load_facilities(session, model, versions[label])
+    if previous and previous.versions[DISTRICT_KEY] == versions[DISTRICT_KEY]:
+        districts = previous.districts
+    else:
+        districts = load_districts(session)
+    if previous and previous.versions[DEAL_KEY] == versions[DEAL_KEY]:
+        district_price_per_sqm = previous.district_price_per_sqm
+    else:
+        district_price_per_sqm = load_district_price_per_sqm(session)
+    return ReferenceData(
+        facilities, districts, district_price_per_sqm, versions, time.monotonic()
+    )
+
+
+class ReferenceCache:
+    def __init__(self, ttl=REFERENCE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.data = None
+
+    def get(self, session=None):
+        with self.lock:
+            if self.data is not None and time.monotonic() - self.data.checked_at < self.ttl:
+                return self.data
+            if session is None:
+                with session_scope() as session:
+                    self.data = load_reference(session, self.data)
+            else:
+                self.data = load_reference(session, self.data)
+            return self.data
+
+    def invalidate(self):
+        # 시설/주소를 바꾼 쪽에서 호출 (다음 get에서 전부 다시 읽음)
+        with self.lock:
+            self.data = None
+
+
+reference_cache = ReferenceCache()
+
+
+def get_reference(session=None):
+    return reference_cache.get(session)
+
+
+def invalidate():
+    reference_cache.invalidate()
+
+
+def invalidate_after_commit(session):
+    # 시설을 바꾼 트랜잭션이 커밋된 뒤에 비움 (롤백되면 다른 세션이 쓰던 캐시 그대로)
+    event.listen(session, "after_commit", lambda _: invalidate(), once=True)
+
+
+def benchmark(repeat=1000):
+    start = time.perf_counter()
+    with session_scope() as session:
+        data = load_reference(session)
+    cold = time.perf_counter() - start
+
+    get_reference()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        get_reference()
+    warm = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    with session_scope() as session:
+        load_versions(session)
+    check = time.perf_counter() - start
+
+    sizes = ", ".join(f"{label} {len(facilities.ids)}" for label, facilities in data.facilities.items())
+    print(f"facilities: {sizes}, districts: {len(data.districts)}")
+    print(
+        f"cold load {cold * 1000:.1f}ms, version check {check * 1000:.1f}ms, "
+        f"cached get {warm * 1e6:.2f}us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="역/정류장/응급실 좌표, 구 목록, 구별 가격 중앙값 캐시 확인")
+    parser.add_argument("--benchmark", action="store_true", help="처음 로드 vs 캐시 조회 시간 비교")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        data = get_reference()
+        for label, facilities in data.facilities.items():
+            print(f"{label}: {len(facilities.ids)} facilities, version {facilities.version}")
+        print(f"districts ({len(data.districts)}): {', '.join(data.districts)}")
+        for district, median in sorted(data.district_price_per_sqm.items()):
+            print(f"  {district}: {median:,.0f} 만원/㎡")
@@ -0,0 +1,327 @@
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, func, select
+
+from db import session_scope
+from models import (
+    Building,
+    Tag,
+    Address,
+    AddressFacilityDistance,
+    BuildingLatestDeal,
+)
+from records import BuildingRecord, load_details
+from reference import get_reference
+
+BUILDING_AGE_THRESHOLD = 5
+SEARCH_LIMIT = 50
+
+# 사용자가 반경(m)을 고르면 태그 대신 미리 계산한 최근접 거리로 필터
+DISTANCE_FILTERS = {
+    "병세권": AddressFacilityDistance.hospital_meters,
+    "역세권": AddressFacilityDistance.subway_meters,
+    "버세권": AddressFacilityDistance.bus_station_meters,
+}
+
+SORT_ORDERS = {
+    "지하철역 가까운 순": AddressFacilityDistance.subway_meters,
+    "버스정류장 가까운 순": AddressFacilityDistance.bus_station_meters,
+    "응급실 가까운 순": AddressFacilityDistance.hospital_meters,
+}
+
+
+def get_price(price):
+    if price == "1억 이하":
+        return (0, 10000)
+    elif price == "1~3억":
+        return (10001, 30000)
+    elif price == "3~5억":
+        return (30001, 50000)
+    elif price == "5~10억":
+        return (50001, 100000)
+    elif price == "10억 이상":
+        return (100001, None)
+
+
+def get_floor(floor):
+    if floor == "전체":
+        return None
+    elif floor == "1~5층 (저층)":
+        return (1, 5)
+    elif floor == "6~8층 (중층)":
+        return (6, 8)
+    elif floor == "9층 이상 (고층)":
+        return (9, None)
+
+
+def build_search_query(session, filters):
+    # 최근 거래는 building_latest_deal에 미리 계산되어 있어 1:1 조인으로 충분
+    # 주소도 한 번만 조인해 구 조건이 ix_address_district를 쓸 수 있게 함
+    query = (
+        session.query(Building)
+        .join(Building.address)
+        .join(BuildingLatestDeal)
+        .outerjoin(
+            AddressFacilityDistance,
+            AddressFacilityDistance.address_id == Building.address_id,
+        )
+    )
+
+    new_building = filters.get("신축 여부")
+    building_type = filters.get("건물 유형")
+    distances = {
+        label: meters
+        for label, meters in (filters.get("거리") or {}).items()
+        if filters.get(label)
+    }
+    tags = [
+        tag
+        for tag, boolean in zip(
+            ["병세권", "역세권", "버세권"],
+            [filters.get("병세권"), filters.get("역세권"), filters.get("버세권")],
+        )
+        if boolean and tag not in distances
+    ]
+    size = [size * 3.3058 for size in filters.get("건물 면적")]
+    price_range = get_price(filters.get("가격 범위"))
+    floor = get_floor(filters.get("층"))
+    district = filters.get("구")
+    if district:
+        query = query.filter(Address.district == district)
+
+    if tags:
+        for tag in tags:
+            query = query.filter(
+                session.query(Tag)
+                .filter(Tag.building_id == Building.id, Tag.label == tag)
+                .exists()
+            )
+
+    for label, meters in distances.items():
+        query = query.filter(DISTANCE_FILTERS[label] <= meters)
+
+    if new_building:
+        query = query.filter(
+            Building.construction_year > datetime.now().year - BUILDING_AGE_THRESHOLD
+        )
+
+    if building_type and building_type != "전체":
+        query = query.filter(Building.purpose == building_type)
+
+    query = query.filter(Building.area_sqm.between(size[0], size[1]))
+
+    if price_range[1] is None:
+        query = query.filter(
+            BuildingLatestDeal.transaction_price_million >= price_range[0]
+        )
+    else:
+        query = query.filter(
+            BuildingLatestDeal.transaction_price_million.between(
+                price_range[0], price_range[1]
+            )
+        )
+
+    if floor:
+        if floor[1] is None:
+            query = query.filter(Building.floor >= floor[0])
+        else:
+            query = query.filter(Building.floor.between(floor[0], floor[1]))
+
+    return query
+
+
+def search_records_query(session, filters, limit=SEARCH_LIMIT):
+    # 필요한 컬럼만 가져와 ORM 객체 대신 BuildingRecord로 반환
+    query = build_search_query(session, filters)
+    sort_column = SORT_ORDERS.get(filters.get("정렬"))
+    if sort_column is not None:
+        query = query.order_by(sort_column.is_(None), sort_column)
+    return (
+        query
+        .with_entities(
+            Building.id,
+            Building.name,
+            Address.district,
+            Address.legal_dong,
+            Building.construction_year,
+            Building.purpose,
+            Building.area_sqm,
+            Building.floor,
+            BuildingLatestDeal.transaction_price_million,
+            BuildingLatestDeal.contract_date,
+            select(func.count(Tag.id))
+            .where(Tag.building_id == Building.id)
+            .correlate(Building)
+            .scalar_subquery()
+            .label("tag_count"),
+            AddressFacilityDistance.subway_meters,
+        )
+        .limit(limit)
+    )
+
+
+def search_buildings(session, filters, limit=SEARCH_LIMIT):
+    query = search_records_query(session, filters, limit)
+    return [BuildingRecord.from_row(row) for row in query]
+
+
+def load_buildings(session, building_ids):
+    # ORM 객체 대신 읽기 전용 BuildingDetail (거래 내역/분기 통계는 구조화 배열), 건물 수와 상관없이 쿼리 3번
+    return load_details(session, building_ids)
+
+
+# 실행 계획 점검용 필터 조합 (가장 넓은 조건 ~ 가장 좁은 조건)
+EXPLAIN_FILTERS = [
+    {"건물 면적": (20, 80), "가격 범위": "1~3억", "층": "전체"},
+    {"건물 면적": (1, 100), "가격 범위": "10억 이상", "층": "9층 이상 (고층)"},
+    {
+        "건물 면적": (20, 80),
+        "가격 범위": "3~5억",
+        "층": "1~5층 (저층)",
+        "구": "강남구",
+        "건물 유형": "아파트",
+        "신축 여부": True,
+        "병세권": True,
+        "역세권": True,
+        "버세권": True,
+    },
+    {
+        "건물 면적": (20, 80),
+        "가격 범위": "5~10억",
+        "층": "전체",
+        "역세권": True,
+        "버세권": True,
+        "거리": {"역세권": 300, "버세권": 100},
+        "정렬": "지하철역 가까운 순",
+    },
+]
+
+
+def explain(session, query):
+    dialect = session.bind.dialect
+    sql = str(
+        query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    )
+    connection = session.connection()
+    if dialect.name == "sqlite":
+        return [
+            row[-1]
+            for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        ]
+    return [
+        f"{row['table']}: type={row['type']}, key={row['key']}"
+        for row in connection.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+    ]
+
+
+def full_scans(plan):
+    # 인덱스를 처음부터 끝까지 읽는 것도 풀 스캔: MySQL은 type=ALL/index, SQLite는 SEARCH가 아닌 SCAN
+    return [
+        line
+        for line in plan
+        if "type=ALL" in line or "type=index," in line or line.startswith("SCAN ")
+    ]
+
+
+def check_query_plans(session, filter_list=EXPLAIN_FILTERS):
+    failures = []
+    for filters in filter_list:
+        plan = explain(session, search_records_query(session, filters))
+        scans = full_scans(plan)
+        print(f"{'FAIL' if scans else 'OK'} {filters}")
+        for line in plan:
+            print(f"    {line}")
+        failures.extend(scans)
+    return failures
+
+
+def count_queries(session, building_ids):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        load_buildings(session, building_ids)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def check_query_counts(session, sizes=(1, 5, SEARCH_LIMIT)):
+    building_ids = [
+        building_id for building_id, in session.query(Building.id).limit(max(sizes))
+    ]
+    counts = {size: count_queries(session, building_ids[:size]) for size in sizes}
+    print(f"queries per recommendation count: {counts}")
+    return len(set(counts.values())) == 1
+
+
+def random_filters(rng, districts):
+    return {
+        "구": rng.choice([None, *districts]),
+        "건물 유형": rng.choice(["전체", "아파트", "오피스텔", "연립다세대"]),
+        "건물 면적": sorted(rng.sample(range(1, 101), 2)),
+        "가격 범위": rng.choice(["1억 이하", "1~3억", "3~5억", "5~10억", "10억 이상"]),
+        "층": rng.choice(["전체", "1~5층 (저층)", "6~8층 (중층)", "9층 이상 (고층)"]),
+        "신축 여부": rng.random() < 0.3,
+        "병세권": rng.random() < 0.3,
+        "역세권": rng.random() < 0.3,
+        "버세권": rng.random() < 0.3,
+        "거리": {"역세권": rng.choice([200, 500, 1000])},
+    }
+
+
+def timed_search(filters):
+    start = time.perf_counter()
+    with session_scope() as session:
+        search_buildings(session, filters)
+    return time.perf_counter() - start
+
+
+def load_test(requests=500, concurrency=20, seed=0):
+    rng = random.Random(seed)
+    districts = get_reference().districts
+    filter_list = [random_filters(rng, districts) for _ in range(requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed_search, filter_list))
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{requests} searches, {concurrency} concurrent: {requests / elapsed:.1f} req/sec")
+    print(f"p50: {percentiles[49] * 1000:.1f}ms, p99: {percentiles[98] * 1000:.1f}ms")
+    return percentiles[49], percentiles[98]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="매물 검색 쿼리 실행 계획 점검")
+    parser.add_argument("--explain", action="store_true")
+    parser.add_argument(
+        "--query-count",
+        action="store_true",
+        help="추천 건물 수가 늘어도 결과 페이지 쿼리 수가 같은지 확인",
+    )
+    parser.add_argument(
+        "--load-test", type=int, metavar="REQUESTS", help="동시 검색 부하 테스트"
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.load_test:
+        load_test(args.load_test, args.concurrency)
+
+    with session_scope() as session:
+        failed = args.explain and bool(check_query_plans(session))
+        failed |= args.query_count and not check_query_counts(session)
+        if failed:
+            sys.exit(1)
@@ -0,0 +1,190 @@
+import os
+import time
+import resource
+import argparse
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from db import session_scope
+from models import Address, Building, RealestateDeal
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "Data/snapshot")
+EXPORT_CHUNK_SIZE = 100000
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# 구/동/용도 등 반복되는 문자열은 사전(category), 숫자는 가능한 작은 타입
+# 위도/경도는 float32로 줄이면 1m 가까이 오차가 생겨 float64 유지
+SCHEMAS = {
+    Address: pa.schema(
+        [
+            ("id", pa.int32()),
+            ("district", CATEGORY),
+            ("legal_dong", CATEGORY),
+            ("main_lot_number", pa.int16()),
+            ("sub_lot_number", pa.int16()),
+            ("latitude", pa.float64()),
+            ("longitude", pa.float64()),
+        ]
+    ),
+    Building: pa.schema(
+        [
+            ("id", pa.int32()),
+            ("address_id", pa.int32()),
+            ("name", pa.string()),
+            ("construction_year", pa.int16()),
+            ("purpose", CATEGORY),
+            ("area_sqm", pa.float32()),
+            ("floor", pa.int16()),
+        ]
+    ),
+    RealestateDeal: pa.schema(
+        [
+            ("id", pa.int32()),
+            ("building_id", pa.int32()),
+            ("reception_year", pa.int16()),
+            ("transaction_price_million", pa.int32()),
+            ("report_type", CATEGORY),
+            ("reported_real_estate_agent_district", CATEGORY),
+            ("contract_year", pa.int16()),
+            ("contract_month", pa.int8()),
+            ("contract_day", pa.int8()),
+            ("contract_date", pa.date32()),
+        ]
+    ),
+}
+
+TABLES = {model.__tablename__: model for model in SCHEMAS}
+
+
+def snapshot_path(name, snapshot_dir=SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, f"{name}.parquet")
+
+
+def export_table(session, model, path, chunk_size=EXPORT_CHUNK_SIZE):
+    # id 구간별로 읽어 row group 단위로 기록 (전체 테이블을 메모리에 올리지 않음)
+    schema = SCHEMAS[model]
+    columns = [model.__table__.c[name] for name in schema.names]
+    rows = last_id = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            batch = session.execute(
+                select(*columns).where(model.id > last_id).order_by(model.id).limit(chunk_size)
+            ).all()
+            if not batch:
+                return rows
+            df = pd.DataFrame(batch, columns=schema.names)
+            if model is Building:
+                df["area_sqm"] = df["area_sqm"].astype(float)
+            if model is Address:
+                # 부번 없음(NULL)은 0으로 저장해 int16 유지 (geocoding.address_names와 같은 규칙)
+                df["sub_lot_number"] = df["sub_lot_number"].fillna(0)
+            writer.write_table(pa.Table.from_pandas(df, preserve_index=False).cast(schema))
+            rows += len(batch)
+            last_id = batch[-1][0]
+
+
+def export_snapshot(session, snapshot_dir=SNAPSHOT_DIR):
+    os.makedirs(snapshot_dir, exist_ok=True)
+    return {
+        name: export_table(session, model, snapshot_path(name, snapshot_dir))
+        for name, model in TABLES.items()
+    }
+
+
+def load_table(name, columns=None, snapshot_dir=SNAPSHOT_DIR):
+    # 필요한 컬럼만 읽고, 사전 컬럼은 pandas category로 변환됨
+    table = pq.read_table(snapshot_path(name, snapshot_dir), columns=columns, memory_map=True)
+    return table.to_pandas(date_as_object=False)
+
+
+def load_deal_history(columns=None, snapshot_dir=SNAPSHOT_DIR):
+    # 거래 + 건물 + 주소를 합친 분석용 테이블 (columns는 세 테이블 컬럼 이름 중에서 선택)
+    columns = set(columns) if columns else None
+
+    def pick(name, keys):
+        available = SCHEMAS[TABLES[name]].names
+        wanted = [column for column in available if columns is None or column in columns]
+        return load_table(name, list(dict.fromkeys(keys + wanted)), snapshot_dir)
+
+    deals = pick("realestate_deal", ["building_id"])
+    buildings = pick("building", ["id", "address_id"]).rename(columns={"id": "building_id"})
+    addresses = pick("address", ["id"]).rename(columns={"id": "address_id"})
+    df = deals.merge(
+        buildings, on="building_id", how="left", suffixes=("", "_building")
+    ).merge(addresses, on="address_id", how="left", suffixes=("", "_address"))
+    return df if columns is None else df[[column for column in df.columns if column in columns]]
+
+
+def peak_rss_mb():
+    # 리눅스 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(kind, source, columns=None, snapshot_dir=SNAPSHOT_DIR):
+    # 새 프로세스에서 한 번 읽고 시간/최대 RSS/DataFrame 메모리를 측정
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if kind == "csv":
+        df = pd.read_csv(source, usecols=columns)
+    elif kind == "parquet":
+        df = load_table(source, columns, snapshot_dir)
+    else:
+        df = load_deal_history(columns, snapshot_dir)
+    seconds = time.perf_counter() - start
+    return seconds, peak_rss_mb() - baseline, df.memory_usage(deep=True).sum() / 1024 / 1024, len(df)
+
+
+def measure_in_subprocess(*args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(measure, *args).result()
+
+
+def benchmark(data_dir="Data", snapshot_dir=SNAPSHOT_DIR):
+    csv_path = os.path.join(data_dir, "refined-real-estate.csv")
+    cases = [
+        ("csv: refined-real-estate.csv", "csv", csv_path, None),
+        (
+            "csv: 4 columns",
+            "csv",
+            csv_path,
+            ["자치구명", "건물용도", "물건금액(만원)", "건물면적(㎡)"],
+        ),
+        ("parquet: realestate_deal", "parquet", "realestate_deal", None),
+        ("parquet: deal history (all)", "history", None, None),
+        (
+            "parquet: deal history, 4 columns",
+            "history",
+            None,
+            ["district", "purpose", "transaction_price_million", "area_sqm"],
+        ),
+    ]
+    for label, kind, source, columns in cases:
+        if kind == "csv" and not os.path.exists(source):
+            continue
+        seconds, rss, memory, rows = measure_in_subprocess(kind, source, columns, snapshot_dir)
+        print(
+            f"{label:<36} {rows:>9} rows  {seconds * 1000:>8.1f}ms  "
+            f"peak RSS +{rss:>7.1f}MB  frame {memory:>7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주소/건물/거래 데이터 Parquet 스냅샷")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--data-dir", default="Data")
+    parser.add_argument(
+        "--benchmark", action="store_true", help="CSV와 스냅샷 로드 시간/메모리 비교"
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.data_dir, args.snapshot_dir)
+    else:
+        with session_scope() as session:
+            print(export_snapshot(session, args.snapshot_dir))
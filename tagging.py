@@ -0,0 +1,495 @@
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from sqlalchemy import delete, insert, select, update
+
+from db import session_scope
+from reference import get_reference, invalidate_after_commit
+from models import (
+    Address,
+    AddressFacilityDistance,
+    Hospital,
+    BusStation,
+    Subway,
+    Building,
+    Tag,
+)
+
+HOSPITAL_DISTANCE = 3000
+SUBWAY_STATION_DISTANCE = 500
+BUS_STATION_DISTANCE = 50
+
+# 서울 위도 기준 1도당 거리(m)
+LATITUDE_METERS = 111320
+LONGITUDE_METERS = 88800
+
+TAG_RULES = {
+    "병세권": (Hospital, HOSPITAL_DISTANCE),
+    "역세권": (Subway, SUBWAY_STATION_DISTANCE),
+    "버세권": (BusStation, BUS_STATION_DISTANCE),
+}
+
+# 증분 태깅 시 같은 시설인지 판단하는 키 (응급실은 이름이 같은 다른 병원이 있어 주소까지)
+FACILITY_KEYS = {
+    "병세권": ["name", "address"],
+    "역세권": ["line", "name"],
+    "버세권": ["id"],
+}
+
+FACILITY_CSV_COLUMNS = {
+    "병세권": {},
+    "역세권": {"sttn_line": "line", "sttn_name": "name"},
+    "버세권": {"sttn_no": "id", "sttn_name": "name"},
+}
+
+# 라벨별 가장 가까운 시설 id / 거리(m) 컬럼
+DISTANCE_COLUMNS = {
+    "병세권": ("hospital_id", "hospital_meters"),
+    "역세권": ("subway_id", "subway_meters"),
+    "버세권": ("bus_station_id", "bus_station_meters"),
+}
+
+# MySQL Float(4바이트)에 저장된 좌표는 127도 부근에서 약 7.6e-6도 단위라 약 1m 이내 차이는 같은 위치로 봄
+COORDINATE_TOLERANCE = 1e-5
+# 거리는 0.1m 단위로 반올림해 저장하지만 MySQL Float에서 다시 읽으면 오차가 생기므로 반올림 단위의 절반까지는 같은 값
+DISTANCE_TOLERANCE = 0.05
+
+INSERT_BATCH_SIZE = 10000
+ID_CHUNK_SIZE = 5000
+
+
+def calc_distance(lat1, lon1, lat2, lon2, distance):
+    x, y = abs(lon1 - lon2) * LONGITUDE_METERS, abs(lat1 - lat2) * LATITUDE_METERS
+    z = (x**2 + y**2) ** (1 / 2)
+    return distance > z
+
+
+def project(latitudes, longitudes):
+    # calc_distance와 같은 평면 근사: 투영 좌표끼리의 유클리드 거리가 곧 미터 거리
+    return np.column_stack(
+        (
+            np.asarray(longitudes, dtype=float) * LONGITUDE_METERS,
+            np.asarray(latitudes, dtype=float) * LATITUDE_METERS,
+        )
+    )
+
+
+def within_distance(points, facility_points, distance):
+    if len(points) == 0 or len(facility_points) == 0:
+        return np.zeros(len(points), dtype=bool)
+    tree = cKDTree(facility_points)
+    nearest, _ = tree.query(points, k=1, distance_upper_bound=distance)
+    return nearest < distance
+
+
+def compute_tags(address_df, facility_dfs, rules=TAG_RULES):
+    points = project(address_df["latitude"], address_df["longitude"])
+    address_ids = address_df["id"].to_numpy()
+    frames = []
+    for label, (_, distance) in rules.items():
+        facility_df = facility_dfs[label]
+        facility_points = project(facility_df["latitude"], facility_df["longitude"])
+        mask = within_distance(points, facility_points, distance)
+        frames.append(pd.DataFrame({"address_id": address_ids[mask], "label": label}))
+    if not frames:
+        return pd.DataFrame(columns=["address_id", "label"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_distances(address_df, facility_dfs, columns=DISTANCE_COLUMNS):
+    points = project(address_df["latitude"], address_df["longitude"])
+    df = pd.DataFrame({"address_id": address_df["id"].to_numpy()})
+    for label, (id_column, meters_column) in columns.items():
+        facility_df = facility_dfs[label]
+        if facility_df.empty or len(points) == 0:
+            df[id_column] = None
+            df[meters_column] = np.nan
+            continue
+        tree = cKDTree(project(facility_df["latitude"], facility_df["longitude"]))
+        distances, indexes = tree.query(points, k=1)
+        df[id_column] = facility_df["id"].to_numpy()[indexes]
+        # 반올림해 두면 다시 계산해도 값이 같아 바뀐 행만 갱신 가능
+        df[meters_column] = np.round(distances, 1)
+    return df
+
+
+def load_coordinates(session, model, ids=None):
+    query = select(model.id, model.latitude, model.longitude)
+    if ids is not None:
+        query = query.where(model.id.in_(ids))
+    return pd.DataFrame(
+        session.execute(query).all(), columns=["id", "latitude", "longitude"]
+    )
+
+
+def load_facilities(session, rules=TAG_RULES, cached=True):
+    # 프로세스 캐시(reference.py)의 시설 좌표 사용 (DB는 버전 확인 때만 조회)
+    # 커밋 전 변경을 반영해야 하면 cached=False로 세션에서 직접 읽음 (캐시에는 넣지 않음)
+    if not cached:
+        return {label: load_coordinates(session, TAG_RULES[label][0]) for label in rules}
+    facilities = get_reference(session).facilities
+    return {label: facilities[label].frame() for label in rules}
+
+
+def load_buildings(session, address_ids=None):
+    query = select(Building.id, Building.address_id)
+    if address_ids is not None:
+        query = query.where(Building.address_id.in_(address_ids))
+    return pd.DataFrame(
+        session.execute(query).all(), columns=["building_id", "address_id"]
+    )
+
+
+def building_tags(address_tags, building_df):
+    return address_tags.merge(building_df, on="address_id")[["building_id", "label"]]
+
+
+def bulk_insert(session, model, df, batch_size=INSERT_BATCH_SIZE):
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    for start in range(0, len(records), batch_size):
+        session.execute(insert(model), records[start : start + batch_size])
+    return len(records)
+
+
+def chunks(values, size=ID_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def tag_all(session, batch_size=INSERT_BATCH_SIZE):
+    address_df = load_coordinates(session, Address)
+    address_tags = compute_tags(address_df, load_facilities(session))
+    tags = building_tags(address_tags, load_buildings(session))
+
+    session.execute(delete(Tag))
+    count = bulk_insert(session, Tag, tags, batch_size)
+    session.commit()
+    return count
+
+
+def load_distances(session, address_ids=None):
+    table = AddressFacilityDistance.__table__
+    query = select(table)
+    if address_ids is not None:
+        query = query.where(table.c.address_id.in_(address_ids))
+    return pd.DataFrame(
+        session.execute(query).all(), columns=[column.name for column in table.columns]
+    )
+
+
+def distance_differs(new, old):
+    return ~np.isclose(
+        new.astype(float), old.astype(float), rtol=0, atol=DISTANCE_TOLERANCE, equal_nan=True
+    )
+
+
+def diff_distances(stored_df, computed_df):
+    value_columns = [column for column in computed_df.columns if column != "address_id"]
+    merged = computed_df.merge(
+        stored_df.astype({"address_id": int}),
+        on="address_id",
+        how="left",
+        suffixes=("", "_old"),
+        indicator=True,
+    )
+    added = merged[merged["_merge"] == "left_only"]
+    both = merged[merged["_merge"] == "both"]
+    changed = both[
+        np.logical_or.reduce(
+            [
+                distance_differs(both[column], both[f"{column}_old"])
+                if column.endswith("_meters")
+                else (both[column] != both[f"{column}_old"])
+                & ~(both[column].isna() & both[f"{column}_old"].isna())
+                for column in value_columns
+            ]
+        )
+    ]
+    return added[computed_df.columns], changed[computed_df.columns]
+
+
+def refresh_distances(
+    session, address_ids=None, batch_size=INSERT_BATCH_SIZE, facility_dfs=None
+):
+    # 전체를 다시 계산해도 KD-tree라 빠르고, 실제로 바뀐 행만 쓰기
+    if facility_dfs is None:
+        facility_dfs = load_facilities(session)
+    groups = [None] if address_ids is None else chunks(sorted(set(address_ids)))
+    added = changed = 0
+    for chunk in groups:
+        address_df = load_coordinates(session, Address, chunk)
+        new_rows, changed_rows = diff_distances(
+            load_distances(session, chunk), compute_distances(address_df, facility_dfs)
+        )
+        added += bulk_insert(session, AddressFacilityDistance, new_rows, batch_size)
+        if not changed_rows.empty:
+            records = changed_rows.astype(object).where(changed_rows.notna(), None)
+            session.execute(update(AddressFacilityDistance), records.to_dict("records"))
+            changed += len(changed_rows)
+    session.commit()
+    return {"added": added, "changed": changed}
+
+
+def retag_addresses(
+    session, address_ids, labels=None, batch_size=INSERT_BATCH_SIZE, facility_dfs=None
+):
+    labels = list(labels or TAG_RULES)
+    rules = {label: TAG_RULES[label] for label in labels}
+    if facility_dfs is None:
+        facility_dfs = load_facilities(session, rules)
+
+    count = 0
+    for chunk in chunks(sorted(address_ids)):
+        session.execute(
+            delete(Tag).where(
+                Tag.label.in_(labels),
+                Tag.building_id.in_(
+                    select(Building.id).where(Building.address_id.in_(chunk))
+                ),
+            )
+        )
+        address_df = load_coordinates(session, Address, chunk)
+        address_tags = compute_tags(address_df, facility_dfs, rules)
+        tags = building_tags(address_tags, load_buildings(session, chunk))
+        count += bulk_insert(session, Tag, tags, batch_size)
+    session.commit()
+    return count
+
+
+def untagged_address_ids(session):
+    # 태그도 최근접 시설 거리도 없는 주소 = 아직 태깅 작업을 거치지 않은 새 주소
+    has_distance = select(AddressFacilityDistance.address_id).where(
+        AddressFacilityDistance.address_id == Address.id
+    )
+    has_tag = (
+        select(Tag.id)
+        .join(Building, Building.id == Tag.building_id)
+        .where(Building.address_id == Address.id)
+    )
+    return session.scalars(
+        select(Address.id).where(~has_distance.exists(), ~has_tag.exists()).order_by(Address.id)
+    ).all()
+
+
+def tag_new_addresses(session, batch_size=INSERT_BATCH_SIZE):
+    address_ids = untagged_address_ids(session)
+    if not address_ids:
+        return {"addresses": 0, "tags": 0, "distances": 0}
+    count = retag_addresses(session, address_ids, batch_size=batch_size)
+    distances = refresh_distances(session, address_ids, batch_size)
+    return {"addresses": len(address_ids), "tags": count, "distances": distances["added"]}
+
+
+def addresses_near(session, points, distance):
+    if len(points) == 0:
+        return set()
+    address_df = load_coordinates(session, Address)
+    if address_df.empty:
+        return set()
+    tree = cKDTree(project(address_df["latitude"], address_df["longitude"]))
+    indexes = set()
+    for near in tree.query_ball_point(points, r=distance):
+        indexes.update(near)
+    return set(address_df["id"].to_numpy()[sorted(indexes)].tolist())
+
+
+def load_facility_rows(session, model):
+    columns = [column.name for column in model.__table__.columns]
+    return pd.DataFrame(session.execute(select(model.__table__)).all(), columns=columns)
+
+
+def read_facility_csv(label, path):
+    model = TAG_RULES[label][0]
+    columns = [column.name for column in model.__table__.columns]
+    df = pd.read_csv(path).rename(columns=FACILITY_CSV_COLUMNS[label])
+    return df[[column for column in columns if column in df.columns]]
+
+
+def dedupe_facilities(df, keys):
+    # loader와 sync가 같은 규칙을 써야 같은 CSV를 다시 sync해도 변경이 없음
+    return df.drop_duplicates(subset=keys, keep="first")
+
+
+def values_differ(new, old, column):
+    if column in ("latitude", "longitude"):
+        return ~np.isclose(
+            new.astype(float), old.astype(float), rtol=0, atol=COORDINATE_TOLERANCE, equal_nan=True
+        )
+    return (new != old) & ~(new.isna() & old.isna())
+
+
+def diff_facilities(stored_df, incoming_df, keys):
+    incoming_df = dedupe_facilities(incoming_df, keys)
+    merged = stored_df.merge(
+        incoming_df, on=keys, how="outer", suffixes=("_old", ""), indicator=True
+    )
+    value_columns = [column for column in incoming_df.columns if column not in keys]
+
+    added = merged[merged["_merge"] == "right_only"]
+    removed = merged[merged["_merge"] == "left_only"]
+    both = merged[merged["_merge"] == "both"]
+    changed = both[
+        np.logical_or.reduce(
+            [
+                values_differ(both[column], both[f"{column}_old"], column)
+                for column in value_columns
+            ]
+        )
+        if value_columns
+        else np.zeros(len(both), dtype=bool)
+    ]
+    moved = changed[
+        values_differ(changed["latitude"], changed["latitude_old"], "latitude")
+        | values_differ(changed["longitude"], changed["longitude_old"], "longitude")
+    ]
+
+    # 시설이 생기거나 사라지거나 옮겨지면 이전/이후 위치 주변 주소만 다시 태깅
+    old_positions = pd.concat(
+        [
+            removed[["latitude_old", "longitude_old"]],
+            moved[["latitude_old", "longitude_old"]],
+        ]
+    )
+    new_positions = pd.concat([added, moved])[["latitude", "longitude"]]
+    points = np.concatenate(
+        [
+            project(old_positions["latitude_old"], old_positions["longitude_old"]),
+            project(new_positions["latitude"], new_positions["longitude"]),
+        ]
+    )
+    return added, removed, changed, points
+
+
+def sync_facilities(session, label, incoming_df, batch_size=INSERT_BATCH_SIZE):
+    model, distance = TAG_RULES[label]
+    keys = FACILITY_KEYS[label]
+    if "id" not in keys:
+        incoming_df = incoming_df.drop(columns="id", errors="ignore")
+    stored_df = load_facility_rows(session, model)
+    added, removed, changed, points = diff_facilities(stored_df, incoming_df, keys)
+
+    for chunk in chunks(removed["id"].astype(int)):
+        session.execute(delete(model).where(model.id.in_(chunk)))
+    if not changed.empty:
+        records = changed[list(incoming_df.columns)].assign(id=changed["id"].astype(int))
+        session.execute(update(model), records.astype(object).to_dict("records"))
+    bulk_insert(session, model, added[list(incoming_df.columns)], batch_size)
+    session.flush()
+    invalidate_after_commit(session)
+    # 아직 커밋 전이라 캐시 대신 이 세션에서 바뀐 시설 좌표를 읽음
+    facility_dfs = load_facilities(session, cached=False)
+
+    address_ids = addresses_near(session, points, distance)
+    count = retag_addresses(session, address_ids, [label], batch_size, facility_dfs)
+    # 가장 가까운 시설은 반경 밖 주소에서도 바뀔 수 있어 전체를 비교
+    distances = refresh_distances(session, batch_size=batch_size, facility_dfs=facility_dfs)
+    return {
+        "added": len(added),
+        "removed": len(removed),
+        "changed": len(changed),
+        "addresses": len(address_ids),
+        "tags": count,
+        "distances": distances["added"] + distances["changed"],
+    }
+
+
+# 기존 노트북의 이중 루프와 비교하는 벤치마크 (DB 없이 CSV로 실행)
+def load_csv_data(data_dir):
+    address_df = pd.read_csv(os.path.join(data_dir, "address-to-geo.csv"))
+    address_df = address_df.rename(columns={"lat": "latitude", "lon": "longitude"})
+    address_df["id"] = np.arange(1, len(address_df) + 1)
+    facility_dfs = {
+        "병세권": pd.read_csv(os.path.join(data_dir, "refined-emergency.csv")),
+        "역세권": pd.read_csv(os.path.join(data_dir, "refined-subway.csv")),
+        "버세권": pd.read_csv(os.path.join(data_dir, "refined-bus.csv")),
+    }
+    return address_df, facility_dfs
+
+
+def loop_tags(address_df, facility_dfs, rules=TAG_RULES):
+    rows = []
+    for data in address_df.itertuples():
+        for label, (_, distance) in rules.items():
+            if any(
+                calc_distance(
+                    data.latitude, data.longitude, row.latitude, row.longitude, distance
+                )
+                for row in facility_dfs[label].itertuples()
+            ):
+                rows.append((data.id, label))
+    return pd.DataFrame(rows, columns=["address_id", "label"])
+
+
+def benchmark(data_dir="Data", sample=200):
+    address_df, facility_dfs = load_csv_data(data_dir)
+    sample_df = address_df.sample(min(sample, len(address_df)), random_state=0)
+
+    start = time.perf_counter()
+    expected = loop_tags(sample_df, facility_dfs)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = compute_tags(address_df, facility_dfs)
+    vectorized_seconds = time.perf_counter() - start
+
+    sample_result = result[result["address_id"].isin(sample_df["id"])]
+    matches = set(map(tuple, expected.to_numpy())) == set(
+        map(tuple, sample_result.to_numpy())
+    )
+    estimated_loop_seconds = loop_seconds / len(sample_df) * len(address_df)
+
+    print(f"addresses: {len(address_df)} (loop sample: {len(sample_df)})")
+    print(f"loop: {loop_seconds:.2f}s for sample, ~{estimated_loop_seconds:.0f}s estimated for all")
+    print(f"kd-tree: {vectorized_seconds:.3f}s for all ({len(result)} address tags)")
+    print(f"speedup: ~{estimated_loop_seconds / vectorized_seconds:.0f}x, sample matches: {matches}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="역세권/버세권/병세권 태깅")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument(
+        "--sync",
+        nargs=2,
+        action="append",
+        metavar=("LABEL", "CSV"),
+        help="시설 데이터 갱신 후 영향 받는 주소만 다시 태깅 (예: --sync 버세권 Data/refined-bus.csv)",
+    )
+    parser.add_argument(
+        "--addresses",
+        nargs="*",
+        type=int,
+        help="지정한 주소만 태깅 (id 없이 쓰면 태그/거리가 없는 새 주소를 찾아 태깅)",
+    )
+    parser.add_argument(
+        "--distances",
+        action="store_true",
+        help="태그 없이 주소별 가장 가까운 시설 거리만 다시 계산",
+    )
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--data-dir", default="Data")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.data_dir, args.sample)
+    else:
+        with session_scope() as session:
+            if args.distances:
+                print(f"distances: {refresh_distances(session)}")
+            elif args.sync or args.addresses is not None:
+                if args.addresses:
+                    print(f"{retag_addresses(session, args.addresses)} tags created")
+                    print(f"distances: {refresh_distances(session, args.addresses)}")
+                else:
+                    # sync가 전체 거리를 다시 계산하기 전에 새 주소부터 찾아 태깅
+                    print(f"new addresses: {tag_new_addresses(session)}")
+                for label, path in args.sync or []:
+                    result = sync_facilities(session, label, read_facility_csv(label, path))
+                    print(f"{label}: {result}")
+            else:
+                print(f"{tag_all(session)} tags created")
+                print(f"distances: {refresh_distances(session)}")
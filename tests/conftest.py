@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Base
+from projections import refresh_latest_deals, refresh_quarter_stats
+from records import seed
+
+SEED_ROWS = 500
+
+
+# 모듈마다 새 SQLite DB (records.seed 데이터 + 최근 거래/분기 통계 집계)
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, SEED_ROWS)
+        refresh_latest_deals(session)
+        refresh_quarter_stats(session)
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+from dashboard_features import (
+    MARKER_COLORS,
+    check,
+    color_bins,
+    construction_year,
+    fit_trendline,
+    legacy_construction_year,
+    legacy_get_color,
+    region,
+    sample_deals,
+)
+
+
+def test_vectorized_features_match_row_wise():
+    matches, building_count = check(sample_deals(20000))
+    assert matches == {"construction_year": True, "region": True, "markers": True}
+    assert building_count["거래량"].sum() == 20000
+
+
+def test_region_joins_district_and_dong():
+    df = pd.DataFrame({"자치구명": ["강남구", "마포구", "강남구"], "법정동명": ["역삼동", "공덕동", "역삼동"]})
+    result = region(df)
+    assert result.dtype == "category"
+    assert result.astype(str).tolist() == ["강남구 역삼동", "마포구 공덕동", "강남구 역삼동"]
+
+
+def test_unknown_construction_year_uses_contract_year():
+    df = pd.DataFrame({"건축년도": [0, 1999, 0, 2020], "계약연도": [2021, 2022, 2023, 2024]})
+    result = construction_year(df)
+    assert result.tolist() == [2021, 1999, 2023, 2020]
+    assert result.equals(legacy_construction_year(df))
+    # 입력 데이터프레임은 그대로
+    assert df["건축년도"].tolist() == [0, 1999, 0, 2020]
+
+
+def test_color_bins_match_legacy():
+    values = np.arange(1, 101)
+    expected = [legacy_get_color(value, values.max()) for value in values]
+    assert color_bins(values, values.max()).tolist() == expected
+    assert color_bins([100], 100)[0] == MARKER_COLORS[-1]
+
+
+def test_trendline_matches_statsmodels_ols():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(10, 200, 1000)
+    y = 3.5 * x + 20 + rng.normal(0, 30, 1000)
+    result = fit_trendline(x, y)
+    model = sm.OLS(y, sm.add_constant(x)).fit()
+    assert np.isclose(result["intercept"], model.params[0])
+    assert np.isclose(result["slope"], model.params[1])
+    assert np.isclose(result["r"] ** 2, model.rsquared)
+    assert np.isclose(result["p"], model.pvalues[1])
+    assert (result["rows"], result["x_min"], result["x_max"]) == (1000, x.min(), x.max())
@@ -0,0 +1,68 @@
+import numpy as np
+from sqlalchemy import select
+
+from deal_stats import (
+    building_quarter_stats,
+    loop_quarterly_deal_stats,
+    quarter_label,
+    quarterly_deal_stats,
+    stored_quarter_stats,
+)
+from models import Building
+from projections import check_quarter_stats
+from records import load_details
+
+
+def test_numpy_quarter_stats_match_loop():
+    rng = np.random.default_rng(0)
+    years = rng.integers(2021, 2025, 500)
+    months = rng.integers(1, 13, 500)
+    prices = rng.integers(10000, 300000, 500)
+    # 기존 계산은 최근 거래가 앞에 오는 순서를 가정
+    order = np.lexsort((months, years))[::-1]
+    deals = [(int(years[i]), int(months[i]), int(prices[i])) for i in order]
+
+    quarters, counts, averages = quarterly_deal_stats(years, months, prices)
+    expected = loop_quarterly_deal_stats(deals)
+    assert quarters == expected[0]
+    assert list(counts) == expected[1]
+    assert averages == expected[2]
+
+
+def test_empty_quarters_are_filled():
+    quarters, counts, averages = quarterly_deal_stats([2023, 2024], [2, 8], [10000, 30000])
+    assert quarters == ["2023.1", "2023.2", "2023.3", "2023.4", "2024.1", "2024.2", "2024.3"]
+    assert list(counts) == [1, 0, 0, 0, 0, 0, 1]
+    assert averages == [1.0, None, None, None, None, None, 3.0]
+    assert quarter_label(2024 * 4 + 3) == "2024.4"
+
+
+def test_empty_deals():
+    quarters, counts, averages = quarterly_deal_stats([], [], [])
+    assert quarters == [] and len(counts) == 0 and averages == []
+
+
+def test_stored_quarter_stats_match_raw_deals(session):
+    assert check_quarter_stats(session)
+    building_ids = session.scalars(select(Building.id).limit(50)).all()
+    for detail in load_details(session, building_ids):
+        deals = detail.deals
+        raw = quarterly_deal_stats(
+            deals["contract_year"], deals["contract_month"], deals["transaction_price_million"]
+        )
+        stored = stored_quarter_stats(detail.quarters)
+        assert stored[0] == raw[0]
+        assert list(stored[1]) == list(raw[1])
+        assert stored[2] == raw[2]
+
+
+def test_missing_or_stale_quarter_stats_fall_back_to_deals(session):
+    detail = load_details(session, [1])[0]
+    expected = stored_quarter_stats(detail.quarters)
+    for stats in (detail.quarters[:0], detail.quarters.copy()):
+        if len(stats):
+            stats["deal_count"] += 1
+        quarters, counts, averages = building_quarter_stats(stats, detail.deals)
+        assert quarters == expected[0]
+        assert list(counts) == list(expected[1])
+        assert averages == expected[2]
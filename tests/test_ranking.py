@@ -0,0 +1,122 @@
+import time
+import logging
+from dataclasses import replace
+from datetime import date
+
+from langchain_core.language_models import FakeListLLM
+
+from ranking import PYEONG_PER_SQM, LLMRanker, LocalRanker, features, score
+from recommend import MemoryCache
+from records import BuildingRecord
+from reference import load_district_price_per_sqm
+from search import search_buildings
+
+SEED_FILTERS = {"건물 면적": (10, 30), "가격 범위": "3~5억", "층": "전체"}
+
+
+def buildings(count=8):
+    return [
+        BuildingRecord(
+            id=index,
+            name=f"building-{index}",
+            district="강남구" if index % 2 else "송파구",
+            legal_dong="",
+            construction_year=1990 + index * 3,
+            purpose="아파트",
+            area_sqm=50.0 + index,
+            floor=index,
+            transaction_price_million=40000 + index * 5000,
+            contract_date=date(2024, 1, 1),
+            tag_count=index % 3,
+            subway_meters=100.0 * index,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+class SlowLLM(FakeListLLM):
+    delay: float = 1.0
+
+    def _call(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return super()._call(*args, **kwargs)
+
+
+def seed_medians(session):
+    return {
+        district: median / PYEONG_PER_SQM
+        for district, median in load_district_price_per_sqm(session).items()
+    }
+
+
+def test_local_ranking_on_seed_data_is_deterministic(session):
+    candidates = search_buildings(session, SEED_FILTERS)
+    ranker = LocalRanker(district_medians=seed_medians(session))
+    expected = [23, 22, 420, 323, 223, 21, 123, 419, 322, 222]
+    assert ranker.rank(candidates, SEED_FILTERS, 10) == expected
+    assert ranker.rank(list(reversed(candidates)), SEED_FILTERS, 10) == expected
+
+    scores = dict(zip(features(candidates)["id"], score(features(candidates, ranker.district_medians))))
+    ranked = ranker.rank(candidates, SEED_FILTERS, len(candidates))
+    assert sorted(ranked) == sorted(scores)
+    assert [scores[building_id] for building_id in ranked] == sorted(scores.values(), reverse=True)
+
+
+def test_local_ranking_prefers_better_buildings():
+    base = replace(buildings(1)[0], id=1, subway_meters=300.0)
+    variants = [
+        base,
+        replace(base, id=2, transaction_price_million=base.transaction_price_million - 5000),
+        replace(base, id=3, construction_year=base.construction_year + 10),
+        replace(base, id=4, subway_meters=None),
+        replace(base, id=5, subway_meters=50.0),
+    ]
+    ranker = LocalRanker(district_medians={})
+    ranked = ranker.rank(variants, {}, len(variants))
+    assert ranked.index(2) < ranked.index(1)
+    assert ranked.index(3) < ranked.index(1)
+    # 거리 없는 건물은 후보 중 가장 먼 거리로 취급 (동점이면 입력 순서)
+    assert ranked.index(5) < ranked.index(1) < ranked.index(4)
+    assert ranker.rank([], {}) == []
+
+
+def llm_ranker(llm, **kwargs):
+    # DB 없이 후보 안의 구별 중앙값으로 로컬 순위 계산, 테스트마다 새 추천 캐시
+    return LLMRanker(LocalRanker(district_medians={}), llm=llm, cache=MemoryCache(), **kwargs)
+
+
+def test_llm_choice_goes_first():
+    candidates = buildings()
+    local = LocalRanker(district_medians={}).rank(candidates, {}, len(candidates))
+    ranker = llm_ranker(FakeListLLM(responses=[f'{{"ids": [{local[-1]}, 999]}}']), timeout=5)
+    assert ranker.rank(candidates, {}) == [local[-1], *local[:4]]
+
+
+def test_slow_llm_falls_back_to_local_order(caplog):
+    candidates = buildings()
+    local = LocalRanker(district_medians={}).rank(candidates, {})
+    ranker = llm_ranker(SlowLLM(responses=['{"ids": [1]}'], delay=1.0), timeout=0.1)
+    with caplog.at_level(logging.WARNING, logger="ranking"):
+        assert ranker.rank(candidates, {}) == local
+    assert "llm_rerank timeout" in caplog.text
+
+
+def test_llm_error_falls_back_to_local_order(caplog):
+    candidates = buildings()
+    local = LocalRanker(district_medians={}).rank(candidates, {})
+    ranker = llm_ranker(FakeListLLM(responses=["not json"]), timeout=5)
+    with caplog.at_level(logging.WARNING, logger="ranking"):
+        assert ranker.rank(candidates, {}) == local
+    assert "llm_rerank failed" in caplog.text
+
+
+def test_busy_workers_return_local_order_without_job(caplog):
+    candidates = buildings()
+    ranker = llm_ranker(SlowLLM(responses=['{"ids": [1]}'], delay=0.3), workers=1)
+    first, job = ranker.start(candidates, {})
+    with caplog.at_level(logging.WARNING, logger="ranking"):
+        second, busy = ranker.start(candidates, {"구": "강남구"})
+    assert job is not None and busy is None
+    assert first == second
+    assert "llm_rerank skipped reason=busy" in caplog.text
+    ranker.finish(job)
@@ -0,0 +1,89 @@
+import time
+from datetime import date
+
+from langchain_core.language_models import FakeListLLM
+
+from recommend import MemoryCache, SQLiteCache, cache_key, recommend
+from records import BuildingRecord
+
+
+def buildings(count=5):
+    return [
+        BuildingRecord(
+            id=index,
+            name=f"building-{index}",
+            district="강남구",
+            legal_dong="역삼동",
+            construction_year=2000 + index,
+            purpose="아파트",
+            area_sqm=60.0 + index,
+            floor=index + 1,
+            transaction_price_million=50000 + index * 1000,
+            contract_date=date(2024, 1, 1),
+            tag_count=index % 3,
+            subway_meters=100.0 * index,
+        )
+        for index in range(1, count + 1)
+    ]
+
+
+def test_cache_key_ignores_order():
+    filters = {"구": "강남구", "건물 면적": (20, 80), "층": "전체"}
+    reordered = {"층": "전체", "건물 면적": [20, 80], "구": "강남구"}
+    assert cache_key(filters, [3, 1, 2]) == cache_key(reordered, [1, 2, 3])
+    assert cache_key(filters, [1, 2, 3]) != cache_key({**filters, "층": "1~5층 (저층)"}, [1, 2, 3])
+    assert cache_key(filters, [1, 2, 3]) != cache_key(filters, [1, 2, 4])
+
+
+def test_memory_cache_expires_and_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2, ttl=60)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    assert cache.get("a") == [1]
+    cache.set("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+
+    cache = MemoryCache(ttl=0.05)
+    cache.set("a", [1])
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_survives_reopen_and_expires(tmp_path):
+    path = tmp_path / "recommend-cache.db"
+    SQLiteCache(path).set("a", [1, 2])
+    assert SQLiteCache(path).get("a") == [1, 2]
+
+    cache = SQLiteCache(tmp_path / "short.db", ttl=0.05)
+    cache.set("a", [1])
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(tmp_path / "recommend-cache.db", maxsize=2)
+    cache.set("a", [1])
+    time.sleep(0.01)
+    cache.set("b", [2])
+    time.sleep(0.01)
+    assert cache.get("a") == [1]
+    time.sleep(0.01)
+    cache.set("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+
+
+def test_recommend_calls_llm_once_per_filters_and_candidates():
+    # 응답을 차례로 돌려주므로 llm.i가 실제 LLM 호출 수
+    llm = FakeListLLM(responses=['{"ids": [3, 1]}', '{"ids": [5]}', '{"ids": [2]}'])
+    cache = MemoryCache()
+    candidates = buildings()
+    filters = {"구": "강남구"}
+
+    assert recommend(candidates, filters, llm=llm, cache=cache) == [3, 1]
+    assert recommend(list(reversed(candidates)), filters, llm=llm, cache=cache) == [3, 1]
+    assert llm.i == 1
+
+    assert recommend(candidates, {"구": "마포구"}, llm=llm, cache=cache) == [5]
+    assert llm.i == 2
@@ -0,0 +1,71 @@
+from sqlalchemy import select
+
+from models import Building
+from search import (
+    EXPLAIN_FILTERS,
+    SEARCH_LIMIT,
+    count_queries,
+    explain,
+    full_scans,
+    load_buildings,
+    search_buildings,
+    search_records_query,
+)
+
+
+def test_search_plans_have_no_full_scans(session):
+    for filters in EXPLAIN_FILTERS:
+        plan = explain(session, search_records_query(session, filters))
+        assert full_scans(plan) == [], (filters, plan)
+
+
+def test_full_scans_flags_table_and_index_scans():
+    plan = [
+        "SCAN building",
+        "SCAN building USING INDEX ix_building_area",
+        "SCAN tag USING COVERING INDEX ix_tag_building_label",
+        "SEARCH building USING INDEX ix_building_area (area_sqm>? AND area_sqm<?)",
+        "SEARCH address USING INTEGER PRIMARY KEY (rowid=?)",
+    ]
+    assert full_scans(plan) == plan[:3]
+    mysql_plan = [
+        "building: type=ALL, key=None",
+        "building: type=index, key=ix_building_area",
+        "building: type=range, key=ix_building_area",
+        "building_latest_deal: type=eq_ref, key=PRIMARY",
+        "tag: type=ref, key=ix_tag_label_building",
+        "building: type=index_merge, key=ix_building_area,ix_building_construction_year",
+    ]
+    assert full_scans(mysql_plan) == mysql_plan[:2]
+
+
+def test_result_page_query_count_does_not_grow(session):
+    building_ids = session.scalars(select(Building.id).limit(SEARCH_LIMIT)).all()
+    counts = {size: count_queries(session, building_ids[:size]) for size in (1, 5, SEARCH_LIMIT)}
+    assert set(counts.values()) == {3}, counts
+
+
+def test_load_buildings_keeps_order_and_splits_deals(session):
+    building_ids = [7, 3, 42]
+    details = load_buildings(session, building_ids)
+    assert [detail.id for detail in details] == building_ids
+    for detail in details:
+        assert len(detail.deals) == 1
+        assert (detail.deals["building_id"] == detail.id).all()
+
+
+def test_district_filter_uses_joined_address(session):
+    filters = {"건물 면적": (10, 30), "가격 범위": "3~5억", "층": "1~5층 (저층)", "구": "강남구"}
+    sql = str(search_records_query(session, filters).statement.compile(session.bind))
+    assert "EXISTS" not in sql
+    assert sql.count("JOIN address ") == 1
+    assert "address.district = " in sql
+
+    records = search_buildings(session, filters)
+    assert records
+    for record in records:
+        assert record.district == "강남구"
+        assert 10 * 3.3058 <= record.area_sqm <= 30 * 3.3058
+        assert 30001 <= record.transaction_price_million <= 50000
+        assert 1 <= record.floor <= 5
+    assert search_buildings(session, {**filters, "구": "마포구"}) == []
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select
+
+import reference
+from models import Address, AddressFacilityDistance, BusStation, Tag
+from tagging import (
+    calc_distance,
+    compute_distances,
+    compute_tags,
+    diff_distances,
+    loop_tags,
+    project,
+    sync_facilities,
+    tag_new_addresses,
+    untagged_address_ids,
+    within_distance,
+)
+
+
+def random_points(rng, count, start_id=1):
+    return pd.DataFrame(
+        {
+            "id": np.arange(start_id, start_id + count),
+            "latitude": rng.uniform(37.45, 37.65, count),
+            "longitude": rng.uniform(126.9, 127.1, count),
+        }
+    )
+
+
+def test_kd_tree_tags_match_loop():
+    rng = np.random.default_rng(0)
+    address_df = random_points(rng, 300)
+    facility_dfs = {
+        "병세권": random_points(rng, 5),
+        "역세권": random_points(rng, 40),
+        "버세권": random_points(rng, 200),
+    }
+    expected = set(map(tuple, loop_tags(address_df, facility_dfs).to_numpy()))
+    result = set(map(tuple, compute_tags(address_df, facility_dfs).to_numpy()))
+    assert result == expected
+    assert {label for _, label in result} == {"병세권", "역세권", "버세권"}
+
+
+def test_within_distance_uses_same_metric_as_loop():
+    rng = np.random.default_rng(1)
+    address_df = random_points(rng, 200)
+    facility_df = random_points(rng, 30)
+    mask = within_distance(
+        project(address_df["latitude"], address_df["longitude"]),
+        project(facility_df["latitude"], facility_df["longitude"]),
+        500,
+    )
+    expected = [
+        any(
+            calc_distance(address.latitude, address.longitude, row.latitude, row.longitude, 500)
+            for row in facility_df.itertuples()
+        )
+        for address in address_df.itertuples()
+    ]
+    assert mask.tolist() == expected
+
+
+def test_no_facilities_means_no_tags():
+    rng = np.random.default_rng(2)
+    address_df = random_points(rng, 10)
+    empty = pd.DataFrame(columns=["id", "latitude", "longitude"])
+    tags = compute_tags(address_df, {"병세권": empty, "역세권": empty, "버세권": empty})
+    assert tags.empty
+
+
+def distance_fixture(seed=1):
+    rng = np.random.default_rng(seed)
+    address_df = random_points(rng, 100)
+    facility_dfs = {
+        "병세권": random_points(rng, 5, 101),
+        "역세권": random_points(rng, 40, 201),
+        "버세권": pd.DataFrame(columns=["id", "latitude", "longitude"]),
+    }
+    return address_df, facility_dfs
+
+
+def test_nearest_distances_match_brute_force():
+    address_df, facility_dfs = distance_fixture()
+    result = compute_distances(address_df, facility_dfs)
+
+    points = project(address_df["latitude"], address_df["longitude"])
+    for label, (id_column, meters_column) in {
+        "병세권": ("hospital_id", "hospital_meters"),
+        "역세권": ("subway_id", "subway_meters"),
+    }.items():
+        facility_df = facility_dfs[label]
+        facility_points = project(facility_df["latitude"], facility_df["longitude"])
+        distances = np.linalg.norm(points[:, None, :] - facility_points[None, :, :], axis=2)
+        nearest = distances.argmin(axis=1)
+        assert (result[id_column].to_numpy() == facility_df["id"].to_numpy()[nearest]).all()
+        assert np.allclose(result[meters_column], np.round(distances.min(axis=1), 1))
+    assert result["bus_station_meters"].isna().all()
+
+
+def test_float32_stored_distances_are_unchanged():
+    # MySQL Float(4바이트) 컬럼에서 다시 읽은 값과 비교해도 바뀐 행이 없어야 함
+    address_df, facility_dfs = distance_fixture()
+    computed = compute_distances(address_df, facility_dfs)
+    stored = computed.copy()
+    for column in ("hospital_meters", "subway_meters", "bus_station_meters"):
+        stored[column] = stored[column].astype(np.float32).astype(float)
+    assert not np.array_equal(stored["subway_meters"], computed["subway_meters"])
+
+    added, changed = diff_distances(stored, computed)
+    assert added.empty and changed.empty
+
+    stored.loc[3, "subway_meters"] += 0.1
+    stored.loc[5, "subway_id"] = 0
+    added, changed = diff_distances(stored.drop(index=7), computed)
+    assert added["address_id"].tolist() == [computed.loc[7, "address_id"]]
+    assert changed["address_id"].tolist() == computed.loc[[3, 5], "address_id"].tolist()
+
+
+def test_untagged_addresses_are_found_by_anti_join(session):
+    all_ids = session.scalars(select(Address.id).order_by(Address.id)).all()
+    session.execute(insert(AddressFacilityDistance), [{"address_id": all_ids[0]}])
+    # seed는 주소 i에 건물 i, i + 주소 수, ... 를 둠
+    session.execute(insert(Tag), [{"building_id": all_ids[1], "label": "역세권"}])
+    assert untagged_address_ids(session) == all_ids[2:]
+    session.rollback()
+
+
+def test_sync_picks_up_new_addresses_and_invalidates_after_commit(session):
+    address_count = session.scalar(select(func.count(Address.id)))
+    assert tag_new_addresses(session)["addresses"] == address_count
+    assert untagged_address_ids(session) == []
+
+    # sync는 커밋 전 시설을 캐시가 아닌 세션에서 읽어야 함 (캐시를 읽으면 여기서 실패)
+    reference.reference_cache.data = object()
+    latitude, longitude = session.execute(
+        select(Address.latitude, Address.longitude).limit(1)
+    ).one()
+    stations = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "name": ["정류장1", "정류장2"],
+            "latitude": [latitude, 38.0],
+            "longitude": [longitude, 128.0],
+        }
+    )
+    result = sync_facilities(session, "버세권", stations)
+    assert result["added"] == 2 and result["tags"] > 0
+    assert session.scalar(select(func.count(BusStation.id))) == 2
+    assert session.scalar(select(func.count(Tag.id)).where(Tag.label == "버세권")) == result["tags"]
+    # sync가 커밋한 뒤에만 프로세스 캐시를 비움
+    assert reference.reference_cache.data is None
+
+
+def test_rolled_back_change_keeps_reference_cache(session):
+    cached = object()
+    reference.reference_cache.data = cached
+    reference.invalidate_after_commit(session)
+    session.execute(
+        insert(BusStation), [{"id": 99, "name": "임시", "latitude": 37.5, "longitude": 127.0}]
+    )
+    session.rollback()
+    assert reference.reference_cache.data is cached
+    session.commit()
+    assert reference.reference_cache.data is None